@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+from statistics import median
+
+from typing import List, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pathlib3x import Path  # noqa: E402
+
+from softsync.common import Root, Options  # noqa: E402
+from softsync.context import SoftSyncContext  # noqa: E402
+from softsync.commands.cp import softsync_cp, softsync_cp_batch  # noqa: E402
+from softsync.memory import MemoryStore  # noqa: E402
+
+RUNS = 5
+FILES = 10000
+STORE = "bench"
+
+
+def setup() -> Root:
+    # an in-memory root, so that only the logic of the operations is measured
+    MemoryStore.drop(STORE)
+    root = Root(f"mem://{STORE}/src")
+    root.scheme.mkdir(root.path / "real")
+    for i in range(FILES):
+        with root.scheme.open(root.path / f"real/f{i}.txt", mode='w') as file:
+            file.write(str(i))
+    softsync_cp_batch(root, [(Path(f"real/f{i}.txt"), Path(f"links/f{i}.txt"), None) for i in range(FILES)])
+    return root
+
+
+def bench_load(root: Root) -> None:
+    SoftSyncContext(root, Path("links"), True)
+
+
+def bench_dupe(root: Root) -> None:
+    softsync_cp(root, Path("links"), dest_path=Path("dupes"), options=Options(force=True))
+
+
+def bench_sync(root: Root) -> None:
+    MemoryStore.drop(f"{STORE}-dest")
+    softsync_cp(root, Path("links"), Root(f"mem://{STORE}-dest"), options=Options(reconstruct=True))
+
+
+BENCHES = {
+    "load": bench_load,
+    "dupe": bench_dupe,
+    "sync": bench_sync,
+}
+
+
+def run(bench: Callable[[Root], None], root: Root) -> float:
+    start = time.perf_counter()
+    bench(root)
+    return time.perf_counter() - start
+
+
+def main(benches: List[str]) -> None:
+    root = setup()
+    print(f"{'bench':<10}{'median (ms)':>14}{'min (ms)':>12}")
+    for name in benches:
+        times = [run(BENCHES[name], root) for _ in range(RUNS)]
+        print(f"{name:<10}{median(times) * 1000:>14.1f}{min(times) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or list(BENCHES.keys()))
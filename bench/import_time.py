@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+from statistics import median
+
+from typing import List
+
+RUNS = 10
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+COMMANDS = ["cp", "rm", "ls", "repair", "diff", "serve", "client", "watch", "verify"]
+
+
+def import_time(cmd: str) -> int:
+    code = f"from softsync.__main__ import load_command; load_command({cmd!r})"
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    total = 0
+    started = False
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3:
+            continue
+        name = fields[2]
+        # top level imports only, their cumulative time includes their children
+        if name.startswith(" ") and not name.startswith("  "):
+            if started:
+                total += int(fields[1])
+            elif name.strip() == "site":
+                # everything up to, and including, site is interpreter start-up
+                started = True
+    return total
+
+
+def main(commands: List[str]) -> None:
+    print(f"{'command':<10}{'median (ms)':>14}{'min (ms)':>12}")
+    for cmd in commands:
+        times = [import_time(cmd) for _ in range(RUNS)]
+        print(f"{cmd:<10}{median(times) / 1000:>14.1f}{min(times) / 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or COMMANDS)
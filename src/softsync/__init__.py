@@ -1,12 +1,28 @@
-from .__main__ import cli
-from .common import FILE_SCHEME
-from .scheme import StorageScheme, FileStorageScheme
-from .sync import StorageSync, FileFileStorageSync
+import sys
+from importlib import import_module
 
-# register file:// storage scheme and sync as standard
-StorageScheme.register_scheme(FILE_SCHEME, FileStorageScheme)
-StorageSync.register_sync(FILE_SCHEME, FILE_SCHEME, FileFileStorageSync)
+# names are imported on first use, so that the CLI only pays for the command it runs
+__EXPORTS = {
+    "cli": "softsync.__main__",
+    "FILE_SCHEME": "softsync.scheme",
+    "StorageScheme": "softsync.scheme",
+    "FileStorageScheme": "softsync.scheme",
+    "StorageSync": "softsync.sync",
+    "FileFileStorageSync": "softsync.sync",
+}
+
+if sys.version_info < (3, 7):
+    from .__main__ import cli
+    from .scheme import FILE_SCHEME, StorageScheme, FileStorageScheme
+    from .sync import StorageSync, FileFileStorageSync
+else:
+    def __getattr__(name: str):
+        module_name = __EXPORTS.get(name, None)
+        if module_name is None:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        return getattr(import_module(module_name), name)
 
 
 def run():
+    from softsync.__main__ import cli
     cli()
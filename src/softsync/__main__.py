@@ -1,13 +1,10 @@
 import sys
 import os
 from argparse import ArgumentParser
+from contextlib import contextmanager
+from importlib import import_module
 
-from typing import List, Optional
-
-from softsync.commands import cp
-from softsync.commands import rm
-from softsync.commands import ls
-from softsync.commands import repair
+from typing import List, Optional, Callable, Tuple, Generator
 
 from softsync.exception import SoftSyncException, CommandException
 
@@ -19,14 +16,60 @@ def __help(problem: str, parser: ArgumentParser = None) -> None:
         parser.print_help()
 
 
+def __add_trace_args(parser: ArgumentParser) -> None:
+    group = parser.add_argument_group("tracing")
+    group.add_argument("--trace", dest="trace", help="write a chrome trace of the command", metavar="file", type=str)
+    group.add_argument("--profile", dest="profile", help="write a cProfile dump of the command", metavar="file", type=str)
+
+
+@contextmanager
+def __traced(cmd: str, trace_file: Optional[str], profile_file: Optional[str]) -> Generator[None, None, None]:
+    if trace_file is None and profile_file is None:
+        yield
+        return
+    from softsync.trace import Tracer, set_tracer, span
+    tracer = Tracer() if trace_file is not None else None
+    profiler = None
+    if profile_file is not None:
+        from cProfile import Profile
+        profiler = Profile()
+    set_tracer(tracer)
+    try:
+        if profiler is not None:
+            profiler.enable()
+        with span(cmd):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+        set_tracer(None)
+        if tracer is not None:
+            tracer.save(trace_file)
+
+
 CLI_COMMANDS = {
-    "cp": (cp.softsync_cp_cli, cp.softsync_cp_arg_parser),
-    "rm": (rm.softsync_rm_cli, rm.softsync_rm_arg_parser),
-    "ls": (ls.softsync_ls_cli, ls.softsync_ls_arg_parser),
-    "repair": (repair.softsync_repair_cli, repair.softsync_repair_arg_parser)
+    "cp": ("softsync.commands.cp", "softsync_cp_cli", "softsync_cp_arg_parser"),
+    "rm": ("softsync.commands.rm", "softsync_rm_cli", "softsync_rm_arg_parser"),
+    "ls": ("softsync.commands.ls", "softsync_ls_cli", "softsync_ls_arg_parser"),
+    "repair": ("softsync.commands.repair", "softsync_repair_cli", "softsync_repair_arg_parser"),
+    "diff": ("softsync.commands.diff", "softsync_diff_cli", "softsync_diff_arg_parser"),
+    "serve": ("softsync.commands.serve", "softsync_serve_cli", "softsync_serve_arg_parser"),
+    "client": ("softsync.commands.client", "softsync_client_cli", "softsync_client_arg_parser"),
+    "watch": ("softsync.commands.watch", "softsync_watch_cli", "softsync_watch_arg_parser"),
+    "verify": ("softsync.commands.verify", "softsync_verify_cli", "softsync_verify_arg_parser")
 }
 
 
+def load_command(cmd: str) -> Optional[Tuple[Callable, Callable]]:
+    command = CLI_COMMANDS.get(cmd)
+    if command is None:
+        return None
+    module_name, cli_call, arg_parser = command
+    module = import_module(module_name)
+    return getattr(module, cli_call), getattr(module, arg_parser)
+
+
 def cli(cli_args: Optional[List[str]] = None) -> None:
     if cli_args is None:
         cli_args = sys.argv
@@ -40,12 +83,15 @@ def cli(cli_args: Optional[List[str]] = None) -> None:
 
     args = cli_args[2:]
 
-    command = CLI_COMMANDS.get(cmd)
+    command = load_command(cmd)
     if command is not None:
         cli_call, arg_parser = command
         arg_parser = arg_parser()
+        __add_trace_args(arg_parser)
+        tracing, _ = arg_parser.parse_known_args(args)
         try:
-            cli_call(args, arg_parser)
+            with __traced(cmd, tracing.trace, tracing.profile):
+                cli_call(args, arg_parser)
         except CommandException as e:
             __help(str(e), arg_parser)
             return 1
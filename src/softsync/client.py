@@ -0,0 +1,25 @@
+import os
+import json
+import socket
+
+from typing import List, Dict, Any
+
+from softsync.exception import SoftSyncException
+
+SOCKET_ENV_VAR = "SOFTSYNC_SOCKET"
+ENCODING = "utf-8"
+
+
+def request(socket_path: str, args: List[str]) -> Dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            raise SoftSyncException(f"failed to connect to server: {socket_path}: {e}")
+        message = {"args": args, "cwd": os.getcwd()}
+        sock.sendall(json.dumps(message).encode(ENCODING) + b"\n")
+        with sock.makefile("rb") as file:
+            line = file.readline()
+    if not line:
+        raise SoftSyncException(f"no response from server: {socket_path}")
+    return json.loads(line.decode(ENCODING))
@@ -0,0 +1,32 @@
+import os
+import sys
+from argparse import ArgumentParser, REMAINDER
+
+from typing import List, Optional
+
+from softsync.client import SOCKET_ENV_VAR, request
+from softsync.exception import CommandException
+
+
+def softsync_client_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser("softsync client")
+    parser.add_argument("-S", "--socket", dest="socket", help=f"unix socket path (default: ${SOCKET_ENV_VAR})",
+                        metavar="path", type=str, default=os.environ.get(SOCKET_ENV_VAR, None))
+    parser.add_argument("cmd", type=str, nargs=1)
+    parser.add_argument("args", type=str, nargs=REMAINDER)
+    return parser
+
+
+def softsync_client_cli(args: List[str], parser: ArgumentParser) -> None:
+    cmdline = parser.parse_args(args)
+    status, output = softsync_client(cmdline.socket, cmdline.cmd + cmdline.args)
+    sys.stdout.write(output)
+    if status:
+        sys.exit(status)
+
+
+def softsync_client(socket_path: Optional[str], args: List[str]) -> (int, str):
+    if not socket_path:
+        raise CommandException("socket path is required")
+    response = request(socket_path, args)
+    return response["status"], response["output"]
@@ -1,11 +1,15 @@
 from argparse import ArgumentParser
 from pathlib3x import Path
 
-from typing import List, Callable, Optional
+from typing import List, Dict, Tuple, Iterable, Callable, Optional, Generator
 
 from softsync.common import Root, Options, Sync
-from softsync.common import parse_roots, is_glob_pattern, split_path, check_paths_are_disjoint
-from softsync.context import SoftSyncContext, FileEntry
+from softsync.common import parse_roots, is_glob_pattern, split_path, check_paths_are_disjoint, check_not_recursive
+from softsync.context import SoftSyncContext, FileEntry, Transfer
+from softsync.diff import Change, diff_contexts
+from softsync.sync import SymlinkBatch, symlink_batch_for
+from softsync.scheduler import Scheduler, Queue, queue_for_size
+from softsync.policy import Policy, set_policy
 from softsync.exception import CommandException
 
 
@@ -17,14 +21,29 @@ def softsync_cp_arg_parser() -> ArgumentParser:
     parser.add_argument("-f", "--force", dest="force", help="copy over duplicates", action='store_true')
     parser.add_argument("-r", "--recursive", dest="recursive", help="recurse into sub-directories", action='store_true')
     parser.add_argument("-c", "--reconstruct", dest="reconstruct", help="reconstruct file hierarchy", action='store_true')
-    parser.add_argument("-s", "--sync", dest="sync", metavar="modes", help="any of: symbolic,hardlink,copy", type=Sync.as_list)
+    parser.add_argument("-s", "--sync", dest="sync", metavar="modes", help="any of: symbolic,relative,hardlink,copy", type=Sync.as_list)
+    parser.add_argument("-i", "--incremental", dest="incremental", help="sync changes only, including removals", action='store_true')
+    parser.add_argument("--verify", dest="verify", help="copy and record checksums of synced files", action='store_true')
+    parser.add_argument("-j", "--jobs", dest="jobs", help="parallel syncs, between roots", metavar="n", type=int, default=1)
     parser.add_argument("-v", "--verbose", dest="verbose", help="verbose output", action='store_true')
     parser.add_argument("--dry", dest="dry_run", help="dry run only", action='store_true')
+    parser.add_argument("--retries", dest="retries", help="retry transient storage errors", metavar="n", type=int, default=0)
+    parser.add_argument("--ops-limit", dest="ops_limit", help="max storage operations per second", metavar="n", type=float)
+    parser.add_argument("--bytes-limit", dest="bytes_limit", help="max bytes synced per second", metavar="n", type=float)
     return parser
 
 
 def softsync_cp_cli(args: List[str], parser: ArgumentParser) -> None:
     cmdline = parser.parse_args(args)
+    if cmdline.retries or cmdline.ops_limit or cmdline.bytes_limit:
+        try:
+            set_policy(Policy(
+                retries=cmdline.retries,
+                ops_per_sec=cmdline.ops_limit,
+                bytes_per_sec=cmdline.bytes_limit,
+            ))
+        except ValueError as e:
+            raise CommandException(str(e))
     src_root, dest_root = parse_roots(cmdline.roots)
     src_path = Path(cmdline.src_path[0])
     dest_path = Path(cmdline.dest_path) if cmdline.dest_path is not None else None
@@ -33,18 +52,21 @@ def softsync_cp_cli(args: List[str], parser: ArgumentParser) -> None:
         recursive=cmdline.recursive,
         reconstruct=cmdline.reconstruct,
         sync=cmdline.sync,
+        incremental=cmdline.incremental,
+        verify=cmdline.verify,
         verbose=cmdline.verbose,
         dry_run=cmdline.dry_run,
+        jobs=cmdline.jobs,
     )
-    files = softsync_cp(
+    files = softsync_cp_iter(
         src_root,
         src_path,
         dest_root,
         dest_path,
         options
     )
-    if options.verbose:
-        for file in files:
+    for file in files:
+        if options.verbose:
             print(file)
 
 
@@ -53,23 +75,23 @@ def softsync_cp(src_root: Root, src_path: Path,
                 options: Options = Options(),
                 matcher: Optional[Callable] = None,
                 mapper: Optional[Callable] = None) -> List[FileEntry]:
+    return list(softsync_cp_iter(src_root, src_path, dest_root, dest_path, options, matcher, mapper))
+
+
+def softsync_cp_iter(src_root: Root, src_path: Path,
+                     dest_root: Optional[Root] = None, dest_path: Optional[Path] = None,
+                     options: Options = Options(),
+                     matcher: Optional[Callable] = None,
+                     mapper: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
+    check_not_recursive(options)
     if dest_root is None:
         if options.sync:
             raise CommandException("sync option is not valid here")
-        if dest_path is None:
-            raise CommandException("source root only present, expected both 'src-path' and 'dest-path' args")
-        src_dir, src_file = split_path(src_root, src_path)
-        dest_dir, dest_file = split_path(src_root, dest_path)
-        if not check_paths_are_disjoint(src_dir, dest_dir):
-            raise CommandException("'src' and 'dest' paths must be disjoint")
-        if src_file is not None:
-            if matcher is not None:
-                raise CommandException("'src-path' must be a directory if matcher function is used")
-        if dest_file is not None:
-            if is_glob_pattern(dest_file):
-                raise CommandException("'dest-path' cannot be a glob pattern")
-            if mapper is not None:
-                raise CommandException("'dest-path' must be a directory if mapper function is used")
+        if options.incremental:
+            raise CommandException("incremental option is not valid here")
+        if options.verify:
+            raise CommandException("verify option is not valid here")
+        src_dir, src_file, dest_dir, dest_file = __dupe_paths(src_root, src_path, dest_path, matcher, mapper)
         return __dupe(src_root, src_dir, src_file, dest_dir, dest_file, options, matcher, mapper)
     else:
         if src_root.scheme == dest_root.scheme:
@@ -86,23 +108,154 @@ def softsync_cp(src_root: Root, src_path: Path,
         return __sync(src_root, dest_root, src_dir, src_file, options, matcher)
 
 
+def softsync_cp_batch(root: Root, ops: Iterable[Tuple[Path, Path, Optional[Callable]]],
+                      options: Options = Options()) -> List[FileEntry]:
+    check_not_recursive(options)
+    if options.sync:
+        raise CommandException("sync option is not valid here")
+    if options.incremental:
+        raise CommandException("incremental option is not valid here")
+    if options.verify:
+        raise CommandException("verify option is not valid here")
+    # contexts are shared between operations, so each manifest is read and written at most once
+    contexts: Dict[Path, SoftSyncContext] = {}
+    files = []
+    for src_path, dest_path, mapper in ops:
+        src_dir, src_file, dest_dir, dest_file = __dupe_paths(root, src_path, dest_path, None, mapper)
+        src_ctx = __batch_context(contexts, root, src_dir, True, options)
+        dest_ctx = __batch_context(contexts, root, dest_dir, False, options)
+        for file in src_ctx.iter_files(src_file):
+            dest_ctx.dupe_file(file, src_ctx, mapper if mapper is not None else dest_file)
+            files.append(file)
+    for context in contexts.values():
+        context.save()
+    return files
+
+
+def __batch_context(contexts: Dict[Path, SoftSyncContext], root: Root, path: Path, path_must_exist: bool,
+                    options: Options) -> SoftSyncContext:
+    context = contexts.get(path, None)
+    if context is None:
+        context = SoftSyncContext(root, path, path_must_exist, options, lazy=True)
+        contexts[path] = context
+    return context
+
+
+def __dupe_paths(root: Root, src_path: Path, dest_path: Optional[Path],
+                 matcher: Optional[Callable] = None, mapper: Optional[Callable] = None) \
+        -> (Path, Optional[str], Path, Optional[str]):
+    if dest_path is None:
+        raise CommandException("source root only present, expected both 'src-path' and 'dest-path' args")
+    src_dir, src_file = split_path(root, src_path)
+    dest_dir, dest_file = split_path(root, dest_path)
+    if not check_paths_are_disjoint(src_dir, dest_dir):
+        raise CommandException("'src' and 'dest' paths must be disjoint")
+    if src_file is not None:
+        if matcher is not None:
+            raise CommandException("'src-path' must be a directory if matcher function is used")
+    if dest_file is not None:
+        if is_glob_pattern(dest_file):
+            raise CommandException("'dest-path' cannot be a glob pattern")
+        if mapper is not None:
+            raise CommandException("'dest-path' must be a directory if mapper function is used")
+    return src_dir, src_file, dest_dir, dest_file
+
+
 def __dupe(root: Root, src_dir: Path, src_file: str, dest_dir: Path, dest_file: str, options: Options,
-           matcher: Optional[Callable] = None, mapper: Optional[Callable] = None) -> List[FileEntry]:
-    src_ctx = SoftSyncContext(root, src_dir, True, options)
-    dest_ctx = SoftSyncContext(root, dest_dir, False, options)
-    src_files = src_ctx.list_files(matcher if matcher is not None else src_file)
-    for src_file in src_files:
-        dest_ctx.dupe_file(src_file, src_ctx, mapper if mapper is not None else dest_file)
+           matcher: Optional[Callable] = None, mapper: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
+    src_ctx = SoftSyncContext(root, src_dir, True, options, lazy=True)
+    dest_ctx = SoftSyncContext(root, dest_dir, False, options, lazy=True)
+    return __dupe_files(src_ctx, dest_ctx, matcher if matcher is not None else src_file,
+                        mapper if mapper is not None else dest_file)
+
+
+def __dupe_files(src_ctx: SoftSyncContext, dest_ctx: SoftSyncContext,
+                 matcher: Optional[Callable] = None, mapper: Optional[Callable] = None) \
+        -> Generator[FileEntry, None, None]:
+    try:
+        for src_file in src_ctx.iter_files(matcher):
+            dest_ctx.dupe_file(src_file, src_ctx, mapper)
+            yield src_file
+    except GeneratorExit:
+        dest_ctx.save()
+        raise
     dest_ctx.save()
-    return src_files
 
 
 def __sync(src_root: Root, dest_root: Root, src_dir: Path, src_file: Path, options: Options,
-           matcher: Optional[Callable] = None) -> List[FileEntry]:
-    src_ctx = SoftSyncContext(src_root, src_dir, True, options)
-    dest_ctx = SoftSyncContext(dest_root, src_dir, False, options)
-    src_files = src_ctx.list_files(matcher if matcher is not None else src_file)
-    for src_file in src_files:
-        dest_ctx.sync_file(src_file, src_ctx)
+           matcher: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
+    src_ctx = SoftSyncContext(src_root, src_dir, True, options, lazy=True)
+    dest_ctx = SoftSyncContext(dest_root, src_dir, False, options, lazy=True)
+    return __sync_files(src_ctx, dest_ctx, matcher if matcher is not None else src_file)
+
+
+def __sync_files(src_ctx: SoftSyncContext, dest_ctx: SoftSyncContext,
+                 matcher: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
+    batch = None
+    try:
+        if src_ctx.options.incremental:
+            changed = []
+            for difference in diff_contexts(src_ctx, dest_ctx, matcher):
+                if difference.change == Change.REMOVED:
+                    dest_ctx.rm_file(difference.dest_file)
+                    yield difference.dest_file
+                else:
+                    changed.append(difference.src_file)
+            # when reconstructing, unchanged softlinks may still point at changed files, so all are checked
+            src_files = changed if not src_ctx.options.reconstruct else src_ctx.list_files(matcher)
+        else:
+            src_files = src_ctx.list_files(matcher)
+        src_ctx.prefetch(src_files, dest_ctx)
+        batch = symlink_batch_for(src_ctx, dest_ctx)
+        if batch is None and src_ctx.options.jobs > 1:
+            yield from __schedule_syncs(src_ctx, dest_ctx, src_files)
+        else:
+            synced = {}
+            for src_file in src_files:
+                if dest_ctx.sync_file(src_file, src_ctx, synced, batch) or not src_ctx.options.incremental:
+                    yield src_file
+    except GeneratorExit:
+        __flush_and_save(dest_ctx, batch)
+        raise
+    __flush_and_save(dest_ctx, batch)
+
+
+def __schedule_syncs(src_ctx: SoftSyncContext, dest_ctx: SoftSyncContext,
+                     src_files: List[FileEntry]) -> Generator[FileEntry, None, None]:
+    # softlinks are resolved, and manifests edited, here; only the transfers themselves run on the workers
+    selected: Dict[Tuple[Path, Path], List[FileEntry]] = {}
+    with Scheduler(src_ctx.options.jobs) as scheduler:
+        for src_file in src_files:
+            transfer = dest_ctx.resolve_sync(src_file, src_ctx)
+            if transfer.key in selected:
+                selected[transfer.key].append(src_file)
+                continue
+            selected[transfer.key] = [src_file]
+            queue, size = __queue_for(transfer)
+            scheduler.submit(queue, transfer.run, size=size, tag=transfer.key)
+        for key, synced in scheduler.results():
+            if synced or not src_ctx.options.incremental:
+                yield from selected[key]
+
+
+def __queue_for(transfer: Transfer) -> (Queue, int):
+    # only copies move the file's bytes, links of any kind are metadata, however large the file
+    options = transfer.dest_ctx.options
+    if not options.verify:
+        src_root, dest_root = transfer.src_ctx.root, transfer.dest_ctx.root
+        same_mount = src_root.scheme.name == dest_root.scheme.name and src_root.mount == dest_root.mount
+        modes = options.sync or [Sync.HARDLINK, Sync.COPY]
+        if Sync.COPY not in modes:
+            return Queue.METADATA, 0
+        # modes are tried in order, so any that applies before copying is the one used
+        for mode in modes[:modes.index(Sync.COPY)]:
+            if mode != Sync.HARDLINK or same_mount:
+                return Queue.METADATA, 0
+    size = transfer.src_ctx.root.scheme.stat(transfer.src_file).size
+    return queue_for_size(size), size
+
+
+def __flush_and_save(dest_ctx: SoftSyncContext, batch: Optional[SymlinkBatch]) -> None:
+    if batch is not None:
+        batch.flush()
     dest_ctx.save()
-    return src_files
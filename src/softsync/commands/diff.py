@@ -0,0 +1,45 @@
+from argparse import ArgumentParser
+from pathlib3x import Path
+
+from typing import List, Optional, Callable, Generator
+
+from softsync.common import Options, Root
+from softsync.common import parse_roots, split_path
+from softsync.diff import Difference, diff_roots
+from softsync.exception import CommandException
+
+
+def softsync_diff_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser("softsync diff")
+    parser.add_argument("-R", "--root", dest="roots", help="root dirs", metavar="src:dest", type=str, required=True)
+    parser.add_argument("path", type=str, nargs='?', default="")
+    parser.add_argument("-r", "--recursive", dest="recursive", help="recurse into sub-directories", action='store_true')
+    return parser
+
+
+def softsync_diff_cli(args: List[str], parser: ArgumentParser) -> None:
+    cmdline = parser.parse_args(args)
+    src_root, dest_root = parse_roots(cmdline.roots)
+    path = Path(cmdline.path)
+    options = Options(
+        recursive=cmdline.recursive,
+    )
+    for difference in softsync_diff(
+        src_root,
+        dest_root,
+        path,
+        options
+    ):
+        print(difference)
+
+
+def softsync_diff(src_root: Root, dest_root: Optional[Root], path: Path,
+                  options: Options = Options(),
+                  matcher: Optional[Callable] = None) -> Generator[Difference, None, None]:
+    if dest_root is None:
+        raise CommandException("expected both source and destination roots")
+    path_dir, path_file = split_path(src_root, path)
+    if path_file is not None:
+        if matcher is not None:
+            raise CommandException("'path' must be a directory if matcher function is used")
+    return diff_roots(src_root, dest_root, path_dir, options, matcher if matcher is not None else path_file)
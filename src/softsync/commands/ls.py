@@ -1,7 +1,7 @@
 from argparse import ArgumentParser
 from pathlib3x import Path
 
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Generator
 
 from softsync.common import Options, Root
 from softsync.common import split_path
@@ -18,10 +18,10 @@ def softsync_ls_arg_parser() -> ArgumentParser:
 
 def softsync_ls_cli(args: List[str], parser: ArgumentParser) -> None:
     cmdline = parser.parse_args(args)
-    root = Root(cmdline.root)
+    root = Root.for_spec(cmdline.root)
     path = Path(cmdline.path[0])
     options = Options()
-    files = softsync_ls(
+    files = softsync_ls_iter(
         root,
         path,
         options
@@ -33,9 +33,15 @@ def softsync_ls_cli(args: List[str], parser: ArgumentParser) -> None:
 def softsync_ls(root: Root, path: Path,
                 options: Options = Options(),
                 matcher: Optional[Callable] = None) -> List[FileEntry]:
+    return list(softsync_ls_iter(root, path, options, matcher))
+
+
+def softsync_ls_iter(root: Root, path: Path,
+                     options: Options = Options(),
+                     matcher: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
     path_dir, path_file = split_path(root, path)
     if path_file is not None:
         if matcher is not None:
             raise CommandException("'src-path' must be a directory if matcher function is used")
-    context = SoftSyncContext(root, path_dir, True, options)
-    return context.list_files(matcher if matcher is not None else path_file)
+    context = SoftSyncContext(root, path_dir, True, options, lazy=True)
+    return context.iter_files(matcher if matcher is not None else path_file)
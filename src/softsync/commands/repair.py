@@ -1,11 +1,12 @@
 from argparse import ArgumentParser
 from pathlib3x import Path
 
-from typing import List, Optional
+from typing import List, Tuple, Optional
 
 from softsync.common import Options, Root
 from softsync.common import split_path
 from softsync.context import SoftSyncContext, FileEntry
+from softsync.shard import run_sharded
 from softsync.exception import CommandException, ContextCorruptException
 
 
@@ -14,6 +15,7 @@ def softsync_repair_arg_parser() -> ArgumentParser:
     parser.add_argument("-R", "--root", dest="root", help="root dir", metavar="root", type=str, default=".")
     parser.add_argument("path", type=str, nargs=1)
     parser.add_argument("-r", "--recursive", dest="recursive", help="recurse into sub-directories", action='store_true')
+    parser.add_argument("-j", "--jobs", dest="jobs", help="worker processes, when recursive", metavar="n", type=int, default=1)
     parser.add_argument("-v", "--verbose", dest="verbose", help="verbose output", action='store_true')
     parser.add_argument("--dry", dest="dry_run", help="dry run only", action='store_true')
     return parser
@@ -21,13 +23,30 @@ def softsync_repair_arg_parser() -> ArgumentParser:
 
 def softsync_repair_cli(args: List[str], parser: ArgumentParser) -> None:
     cmdline = parser.parse_args(args)
-    root = Root(cmdline.root)
+    root = Root.for_spec(cmdline.root)
     path = Path(cmdline.path[0])
     options = Options(
         recursive=cmdline.recursive,
         verbose=cmdline.verbose,
         dry_run=cmdline.dry_run,
+        jobs=cmdline.jobs,
     )
+    message = "repaired" if not cmdline.dry_run else "needs repair"
+    if options.recursive:
+        repairs = softsync_repair_tree(
+            root,
+            path,
+            options
+        )
+        if len(repairs) == 0:
+            print("no repair needed")
+        for path_dir, conflicts in repairs:
+            if options.verbose:
+                conflicts = "\n  ".join([str(c) for c in conflicts])
+                print(f"{message}: {path_dir}\n  {conflicts}")
+            else:
+                print(f"{message}: {path_dir}")
+        return
     conflicts = softsync_repair(
         root,
         path,
@@ -36,7 +55,6 @@ def softsync_repair_cli(args: List[str], parser: ArgumentParser) -> None:
     if conflicts is None:
         print("no repair needed")
     else:
-        message = "repaired" if not cmdline.dry_run else "needs repair"
         if options.verbose:
             conflicts = "\n  ".join([str(c) for c in conflicts])
             print(f"{message}:\n  {conflicts}")
@@ -46,11 +64,30 @@ def softsync_repair_cli(args: List[str], parser: ArgumentParser) -> None:
 
 def softsync_repair(root: Root, path: Path,
                     options: Options = Options()) -> Optional[List[FileEntry]]:
+    if options.recursive:
+        raise CommandException("recursive option not valid here, use softsync_repair_tree")
     path_dir, path_file = split_path(root, path)
     if path_file is not None:
         raise CommandException("path must be a directory")
+    return __repair_dir(root, path_dir, options)
+
+
+def softsync_repair_tree(root: Root, path: Path,
+                         options: Options = Options()) -> List[Tuple[Path, List[FileEntry]]]:
+    path_dir, path_file = split_path(root, path)
+    if path_file is not None:
+        raise CommandException("path must be a directory")
+    if not root.scheme.is_dir(root.path / path_dir):
+        raise CommandException(f"directory does not exist: {path_dir}")
+    if not options.recursive:
+        conflicts = __repair_dir(root, path_dir, options)
+        return [(path_dir, conflicts)] if conflicts is not None else []
+    return run_sharded(root, path_dir, __repair_dir, options)
+
+
+def __repair_dir(root: Root, path: Path, options: Options) -> Optional[List[FileEntry]]:
     try:
-        SoftSyncContext(root, path_dir, True, options)
+        SoftSyncContext(root, path, True, options)
         return None
     except ContextCorruptException as e:
         e.source.save()
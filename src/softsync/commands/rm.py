@@ -1,10 +1,10 @@
 from argparse import ArgumentParser
 from pathlib3x import Path
 
-from typing import List, Optional, Callable
+from typing import List, Dict, Iterable, Optional, Callable, Generator
 
 from softsync.common import Options, Root
-from softsync.common import split_path
+from softsync.common import split_path, check_not_recursive
 from softsync.context import SoftSyncContext, FileEntry
 from softsync.exception import CommandException
 
@@ -22,7 +22,7 @@ def softsync_rm_arg_parser() -> ArgumentParser:
 
 def softsync_rm_cli(args: List[str], parser: ArgumentParser) -> None:
     cmdline = parser.parse_args(args)
-    root = Root(cmdline.root)
+    root = Root.for_spec(cmdline.root)
     path = Path(cmdline.path[0])
     options = Options(
         force=cmdline.force,
@@ -30,26 +30,62 @@ def softsync_rm_cli(args: List[str], parser: ArgumentParser) -> None:
         verbose=cmdline.verbose,
         dry_run=cmdline.dry_run,
     )
-    files = softsync_rm(
+    files = softsync_rm_iter(
         root,
         path,
         options
     )
-    if options.verbose:
-        for file in files:
+    for file in files:
+        if options.verbose:
             print(file)
 
 
 def softsync_rm(root: Root, path: Path,
                 options: Options = Options(),
                 matcher: Optional[Callable] = None) -> List[FileEntry]:
+    return list(softsync_rm_iter(root, path, options, matcher))
+
+
+def softsync_rm_iter(root: Root, path: Path,
+                     options: Options = Options(),
+                     matcher: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
+    check_not_recursive(options)
     path_dir, path_file = split_path(root, path)
     if path_file is not None:
         if matcher is not None:
             raise CommandException("'src-path' must be a directory if matcher function is used")
-    context = SoftSyncContext(root, path_dir, True, options)
-    files = context.list_files(matcher if matcher is not None else path_file)
-    for file in files:
-        context.rm_file(file)
-    context.save()
+    context = SoftSyncContext(root, path_dir, True, options, lazy=True)
+    return __rm_files(context, matcher if matcher is not None else path_file)
+
+
+def softsync_rm_batch(root: Root, paths: Iterable[Path],
+                      options: Options = Options()) -> List[FileEntry]:
+    check_not_recursive(options)
+    # contexts are shared between paths, so each manifest is read and written at most once
+    contexts: Dict[Path, SoftSyncContext] = {}
+    files = []
+    for path in paths:
+        path_dir, path_file = split_path(root, path)
+        context = contexts.get(path_dir, None)
+        if context is None:
+            context = SoftSyncContext(root, path_dir, True, options, lazy=True)
+            contexts[path_dir] = context
+        for file in context.list_files(path_file):
+            context.rm_file(file)
+            files.append(file)
+    for context in contexts.values():
+        context.save()
     return files
+
+
+def __rm_files(context: SoftSyncContext, matcher: Optional[Callable] = None) -> Generator[FileEntry, None, None]:
+    # matches are listed up front, as removing them alters the context being iterated
+    files = context.list_files(matcher)
+    try:
+        for file in files:
+            context.rm_file(file)
+            yield file
+    except GeneratorExit:
+        context.save()
+        raise
+    context.save()
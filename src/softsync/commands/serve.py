@@ -0,0 +1,26 @@
+import os
+from argparse import ArgumentParser
+
+from typing import List, Optional
+
+from softsync.client import SOCKET_ENV_VAR
+from softsync.server import serve
+from softsync.exception import CommandException
+
+
+def softsync_serve_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser("softsync serve")
+    parser.add_argument("-S", "--socket", dest="socket", help=f"unix socket path (default: ${SOCKET_ENV_VAR})",
+                        metavar="path", type=str, default=os.environ.get(SOCKET_ENV_VAR, None))
+    return parser
+
+
+def softsync_serve_cli(args: List[str], parser: ArgumentParser) -> None:
+    cmdline = parser.parse_args(args)
+    softsync_serve(cmdline.socket)
+
+
+def softsync_serve(socket_path: Optional[str]) -> None:
+    if not socket_path:
+        raise CommandException("socket path is required")
+    serve(socket_path)
@@ -0,0 +1,66 @@
+import os
+from argparse import ArgumentParser
+from pathlib3x import Path
+
+from typing import List, Generator
+
+from softsync.common import Options, Root
+from softsync.common import split_path
+from softsync.integrity import Integrity, IntegrityCheck, verify_dirs
+from softsync.shard import walk_dirs
+from softsync.exception import CommandException, SoftSyncException
+
+
+def softsync_verify_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser("softsync verify")
+    parser.add_argument("-R", "--root", dest="root", help="root dir", metavar="root", type=str, default=".")
+    parser.add_argument("path", type=str, nargs='?', default="")
+    parser.add_argument("-r", "--recursive", dest="recursive", help="recurse into sub-directories", action='store_true')
+    parser.add_argument("-j", "--jobs", dest="jobs", help="files hashed in parallel", metavar="n", type=int,
+                        default=os.cpu_count() or 1)
+    parser.add_argument("-v", "--verbose", dest="verbose", help="verbose output", action='store_true')
+    return parser
+
+
+def softsync_verify_cli(args: List[str], parser: ArgumentParser) -> None:
+    cmdline = parser.parse_args(args)
+    root = Root.for_spec(cmdline.root)
+    path = Path(cmdline.path)
+    options = Options(
+        recursive=cmdline.recursive,
+        verbose=cmdline.verbose,
+        jobs=cmdline.jobs,
+    )
+    verified = 0
+    failed = 0
+    for check in softsync_verify_iter(
+        root,
+        path,
+        options
+    ):
+        if check.integrity == Integrity.OK:
+            verified += 1
+            if options.verbose:
+                print(check)
+        else:
+            failed += 1
+            print(check)
+    if failed > 0:
+        raise SoftSyncException(f"failed verification: {failed} of {verified + failed} files")
+    print(f"verified: {verified} files")
+
+
+def softsync_verify(root: Root, path: Path,
+                    options: Options = Options()) -> List[IntegrityCheck]:
+    return list(softsync_verify_iter(root, path, options))
+
+
+def softsync_verify_iter(root: Root, path: Path,
+                         options: Options = Options()) -> Generator[IntegrityCheck, None, None]:
+    path_dir, path_file = split_path(root, path)
+    if path_file is not None:
+        raise CommandException("path must be a directory")
+    if not root.scheme.is_dir(root.path / path_dir):
+        raise CommandException(f"directory does not exist: {path_dir}")
+    paths = list(walk_dirs(root, path_dir)) if options.recursive else [path_dir]
+    return verify_dirs(root, paths, options)
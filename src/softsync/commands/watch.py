@@ -0,0 +1,63 @@
+from argparse import ArgumentParser
+from pathlib3x import Path
+
+from typing import List
+
+from softsync.common import Options, Root
+from softsync.common import split_path
+from softsync.watch import Watcher, WatchEvent
+from softsync.exception import CommandException
+
+
+def softsync_watch_arg_parser() -> ArgumentParser:
+    parser = ArgumentParser("softsync watch")
+    parser.add_argument("-R", "--root", dest="root", help="root dir", metavar="root", type=str, default=".")
+    parser.add_argument("path", type=str, nargs=1)
+    parser.add_argument("-r", "--recursive", dest="recursive", help="recurse into sub-directories", action='store_true')
+    parser.add_argument("-i", "--interval", dest="interval", help="polling interval", metavar="seconds", type=float, default=1.0)
+    parser.add_argument("--repair", dest="repair", help="repair conflicts as they appear", action='store_true')
+    parser.add_argument("-v", "--verbose", dest="verbose", help="verbose output", action='store_true')
+    parser.add_argument("--dry", dest="dry_run", help="dry run only", action='store_true')
+    return parser
+
+
+def softsync_watch_cli(args: List[str], parser: ArgumentParser) -> None:
+    cmdline = parser.parse_args(args)
+    root = Root.for_spec(cmdline.root)
+    path = Path(cmdline.path[0])
+    options = Options(
+        recursive=cmdline.recursive,
+        verbose=cmdline.verbose,
+        dry_run=cmdline.dry_run,
+    )
+
+    def report(event: WatchEvent) -> None:
+        if options.verbose:
+            conflicts = "\n  ".join([str(c) for c in event.conflicts])
+            print(f"{event}:\n  {conflicts}", flush=True)
+        else:
+            print(event, flush=True)
+
+    watcher = softsync_watch(
+        root,
+        path,
+        options,
+        cmdline.interval,
+        cmdline.repair
+    )
+    try:
+        watcher.run(report)
+    except KeyboardInterrupt:
+        pass
+
+
+def softsync_watch(root: Root, path: Path,
+                   options: Options = Options(),
+                   interval: float = 1.0,
+                   repair: bool = False) -> Watcher:
+    path_dir, path_file = split_path(root, path)
+    if path_file is not None:
+        raise CommandException("path must be a directory")
+    if interval <= 0:
+        raise CommandException("interval must be positive")
+    return Watcher(root, path_dir, options, interval, repair)
@@ -1,21 +1,22 @@
+import os
 from enum import Enum
 from pathlib3x import Path
 from urllib.parse import urlparse
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, Any
 
-from softsync.scheme import StorageScheme
+from softsync.scheme import StorageScheme, FileStat, FILE_SCHEME
+from softsync.policy import get_policy
+from softsync.trace import span
 from softsync.exception import SoftSyncException, CommandException
 
 
-FILE_SCHEME = "file"
-
-
 class Sync(Enum):
 
     SYMBOLIC = 1
     HARDLINK = 2
     COPY = 3
+    RELATIVE = 4
 
     @staticmethod
     def as_list(sync: str, delim: str = ","):
@@ -30,19 +31,26 @@ class Options:
                  recursive: bool = False,
                  reconstruct: bool = False,
                  sync: List[Sync] = None,
+                 incremental: bool = False,
                  verbose: bool = False,
                  dry_run: bool = False,
+                 jobs: int = 1,
+                 verify: bool = False,
                  ):
         self.__force = force
         self.__recursive = recursive
         self.__reconstruct = reconstruct
         self.__sync = sync
+        self.__incremental = incremental
         self.__verbose = verbose
         self.__dry_run = dry_run
+        self.__jobs = jobs
+        self.__verify = verify
 
-        # TODO add support for recursive option
-        if self.recursive:
-            raise CommandException("recursive option not implemented, yet")
+        if self.jobs < 1:
+            raise CommandException("jobs must be at least 1")
+        if self.verify and self.sync and Sync.COPY not in self.sync:
+            raise CommandException("verify option requires copy sync mode")
 
     @property
     def force(self) -> bool:
@@ -60,6 +68,10 @@ class Options:
     def reconstruct(self) -> bool:
         return self.__reconstruct
 
+    @property
+    def incremental(self) -> bool:
+        return self.__incremental
+
     @property
     def verbose(self) -> bool:
         return self.__verbose
@@ -68,20 +80,52 @@ class Options:
     def dry_run(self) -> bool:
         return self.__dry_run
 
+    @property
+    def jobs(self) -> int:
+        return self.__jobs
+
+    @property
+    def verify(self) -> bool:
+        return self.__verify
+
     def __repr__(self):
         return f"force: {self.force}\n" \
                f"recursive: {self.recursive}\n" \
                f"reconstruct: {self.reconstruct}\n" \
                f"sync: {self.sync}\n" \
+               f"incremental: {self.incremental}\n" \
                f"verbose: {self.verbose}\n" \
-               f"dry_run: {self.dry_run}"
+               f"dry_run: {self.dry_run}\n" \
+               f"jobs: {self.jobs}\n" \
+               f"verify: {self.verify}"
 
 
 class Root:
 
-    def __init__(self, spec: str):
+    __CACHE: Optional[Dict[Tuple[str, str], "Root"]] = None
+
+    @staticmethod
+    def enable_cache() -> None:
+        if Root.__CACHE is None:
+            Root.__CACHE = {}
+
+    @staticmethod
+    def for_spec(spec: str) -> "Root":
+        # roots hold on to the policy in force when they were created, so only those without one are shared
+        if Root.__CACHE is None or get_policy() is not None:
+            return Root(spec)
+        key = (os.getcwd(), spec)
+        root = Root.__CACHE.get(key, None)
+        if root is None:
+            root = Root(spec, listings={})
+            Root.__CACHE[key] = root
+        return root
+
+    def __init__(self, spec: str, listings: Optional[Dict[Path, Any]] = None):
+        self.__listings = listings
         if spec.find("://") == -1:
             spec = f"file://{spec}"
+        self.__spec = spec
         try:
             url = urlparse(spec)
             self.__scheme = StorageScheme.for_url(url)
@@ -106,6 +150,10 @@ class Root:
     def __ne__(self, other):
         return not self == other
 
+    @property
+    def spec(self) -> str:
+        return self.__spec
+
     @property
     def scheme(self) -> StorageScheme:
         return self.__scheme
@@ -118,6 +166,16 @@ class Root:
     def path(self) -> Path:
         return self.__path
 
+    @property
+    def listings(self) -> Optional[Dict[Path, Any]]:
+        return self.__listings
+
+
+def check_not_recursive(options: Options) -> None:
+    # TODO add support for recursive option
+    if options.recursive:
+        raise CommandException("recursive option not implemented, yet")
+
 
 def parse_roots(roots: str) -> (Root, Optional[Root]):
     roots = roots.strip()
@@ -132,14 +190,19 @@ def parse_roots(roots: str) -> (Root, Optional[Root]):
         raise CommandException("invalid roots: expected 1 or 2 components")
     roots = [r.replace("*", "://") for r in roots]
     roots = [r.replace("?", ":\\") for r in roots]
-    src_root = Root(roots[0])
+    src_root = Root.for_spec(roots[0])
     dest_root = None
     if len(roots) == 2:
-        dest_root = Root(roots[1])
+        dest_root = Root.for_spec(roots[1])
     return src_root, dest_root
 
 
 def split_path(root: Root, path: Path) -> (Path, Optional[str]):
+    with span("split_path", root=root, path=path):
+        return __split_path(root, path)
+
+
+def __split_path(root: Root, path: Path) -> (Path, Optional[str]):
     if path.is_absolute():
         raise CommandException(f"invalid path: {path} cannot be absolute")
     if len(path.parts) == 0:
@@ -176,6 +239,11 @@ def check_paths_are_disjoint(path1: Path, path2: Path) -> bool:
            not path2.is_relative_to(path1)
 
 
+def is_modified(src_stat: FileStat, dest_stat: FileStat) -> bool:
+    return src_stat.size != dest_stat.size or \
+           src_stat.mtime > dest_stat.mtime
+
+
 def is_glob_pattern(name: str) -> bool:
     return name.find("*") != -1 or \
            name.find("?") != -1
@@ -1,24 +1,34 @@
 import json
 import re
 import fnmatch
+from threading import Lock
 from pathlib3x import Path
 
-from typing import List, Dict, Union, Optional, Callable, Pattern, Any
+from typing import TYPE_CHECKING, List, Dict, Tuple, Union, Iterable, Optional, Callable, Pattern, Generator, Any
 
 from softsync.common import Root, Options
-from softsync.common import resolve_path
-from softsync.sync import sync
-from softsync.exception import ContextException, ContextCorruptException
+from softsync.scheme import FileStat
+from softsync.manifest import ManifestReader
+from softsync.trace import span
+from softsync.common import resolve_path, is_glob_pattern
+from softsync.exception import SoftSyncException, ContextException, ContextCorruptException
+
+if TYPE_CHECKING:
+    from softsync.sync import SymlinkBatch
 
 SOFTSYNC_MANIFEST_FILENAME = ".softsync"
+INTEGRITY_FILENAME = ".softsync.integrity"
 SOFTLINKS_KEY = "softlinks"
+PREFETCH_WORKERS = 8
+RESERVED_FILENAMES = {SOFTSYNC_MANIFEST_FILENAME, INTEGRITY_FILENAME}
 
 
 class FileEntry:
 
     def __init__(self, name: str, link: Optional[Union[Path, str]] = None):
         self.__name = name
-        self.__link = link if isinstance(link, Path) else Path(link) if link is not None else None
+        # links read from a manifest are kept as strings until needed, as paths are costly to parse
+        self.__link = link
 
     @property
     def name(self) -> str:
@@ -26,10 +36,12 @@ class FileEntry:
 
     @property
     def link(self) -> Path:
+        if isinstance(self.__link, str):
+            self.__link = Path(self.__link)
         return self.__link
 
     def is_soft(self) -> bool:
-        return self.link is not None
+        return self.__link is not None
 
     def __repr__(self) -> str:
         if self.is_soft():
@@ -48,16 +60,22 @@ class FileEntry:
 class SoftSyncContext:
 
     def __init__(self, root: Root, path: Path, path_must_exist: bool, options: Options = Options(),
-                 cache: Optional[Dict[str, "SoftSyncContext"]] = None):
+                 cache: Optional[Dict[str, "SoftSyncContext"]] = None, lazy: bool = False):
         self.__root = root
         self.__path = path
         self.__options = options
         self.__cache = cache if cache is not None else {}
         self.__manifest: Optional[Dict[str, Any]] = None
         self.__files: Dict[str, FileEntry] = {}
+        self.__links: Optional[Dict[str, FileEntry]] = None
+        self.__digests: Optional[Dict[str, str]] = None
+        self.__loaded = False
         self.__dirty = False
+        self.__digests_dirty = False
+        self.__digests_lock = Lock()
         self.__init(path_must_exist)
-        self.load()
+        if not lazy:
+            self.load()
 
     @property
     def root(self) -> Root:
@@ -82,39 +100,101 @@ class SoftSyncContext:
         self.__manifest_file = self.__full_path.joinpath(SOFTSYNC_MANIFEST_FILENAME)
 
     def load(self) -> None:
+        with span("load", root=self.__root, dir=self.__path):
+            self.__load()
+
+    def __load(self) -> None:
         self.__files.clear()
+        self.__links = None
+        stamp = self.__stamp()
+        if self.__load_cached(stamp):
+            return
         if self.__root.scheme.exists(self.__full_path):
             for entry in self.__root.scheme.list_files(self.__full_path):
-                if entry.name == SOFTSYNC_MANIFEST_FILENAME:
+                if entry.name in RESERVED_FILENAMES:
                     continue
                 file_entry = FileEntry(entry.name)
                 if self.__add_file_entry(file_entry, False) is not None:
                     raise ValueError(f"FATAL filesystem conflict, in: {self.__path}, on: {entry.name}")
-            if self.__root.scheme.exists(self.__manifest_file):
-                if not self.__root.scheme.is_file(self.__manifest_file):
-                    raise ContextException("manifest file location conflict")
-                with self.__root.scheme.open(self.__manifest_file, mode='r') as file:
-                    self.__manifest = json.load(file)
-                    entries: List[Dict[str, str]] = self.__manifest.get(SOFTLINKS_KEY, None)
-                    if entries is not None:
-                        conflicts = []
-                        for entry in entries:
-                            file_entry = FileEntry(**entry)
-                            if self.__add_file_entry(file_entry, False) is not None:
-                                conflicts.append(file_entry)
-                        if len(conflicts) > 0:
-                            raise ContextCorruptException(
-                                f"softlink entries conflict with files in: {self.__path}",
-                                conflicts,
-                                self
-                            )
+            conflicts = []
+            for file_entry in self.__load_links():
+                if self.__add_file_entry(file_entry, False) is not None:
+                    conflicts.append(file_entry)
+            if len(conflicts) > 0:
+                raise ContextCorruptException(
+                    f"softlink entries conflict with files in: {self.__path}",
+                    conflicts,
+                    self
+                )
+        self.__loaded = True
+        self.__dirty = False
+        self.__store_cached(stamp)
+
+    def __stamp(self) -> Optional[Tuple[FileStat, Optional[FileStat]]]:
+        if self.__root.listings is None or not self.__root.scheme.exists(self.__full_path):
+            return None
+        manifest_stat = self.__root.scheme.stat(self.__manifest_file) \
+            if self.__root.scheme.exists(self.__manifest_file) else None
+        return self.__root.scheme.stat(self.__full_path), manifest_stat
+
+    def __load_cached(self, stamp: Optional[Tuple[FileStat, Optional[FileStat]]]) -> bool:
+        if stamp is None:
+            return False
+        cached = self.__root.listings.get(self.__path, None)
+        if cached is None or cached[0] != stamp:
+            return False
+        _, files, manifest = cached
+        self.__files.update(files)
+        self.__manifest = dict(manifest) if manifest is not None else None
+        self.__loaded = True
         self.__dirty = False
+        return True
+
+    def __store_cached(self, stamp: Optional[Tuple[FileStat, Optional[FileStat]]]) -> None:
+        if stamp is None:
+            return
+        manifest = dict(self.__manifest) if self.__manifest is not None else None
+        self.__root.listings[self.__path] = (stamp, dict(self.__files), manifest)
+
+    def __load_links(self) -> Generator[FileEntry, None, None]:
+        if not self.__root.scheme.exists(self.__manifest_file):
+            return
+        if not self.__root.scheme.is_file(self.__manifest_file):
+            raise ContextException("manifest file location conflict")
+        with self.__root.scheme.open(self.__manifest_file, mode='r') as file:
+            reader = ManifestReader(file, SOFTLINKS_KEY)
+            for entry in reader:
+                yield FileEntry(**entry)
+            self.__manifest = reader.manifest
+
+    def __ensure_loaded(self) -> None:
+        if not self.__loaded:
+            self.load()
+
+    def __lookup(self, file_name: str) -> Optional[FileEntry]:
+        if self.__root.listings is not None:
+            self.__ensure_loaded()
+        if self.__loaded:
+            return self.__files.get(file_name)
+        if file_name in RESERVED_FILENAMES:
+            return None
+        if self.__root.scheme.is_file(self.__full_path / file_name):
+            return FileEntry(file_name)
+        if self.__links is None:
+            self.__links = {}
+            for file_entry in self.__load_links():
+                self.__links.setdefault(file_entry.name, file_entry)
+        return self.__links.get(file_name)
 
     def __add_file_entry(self, file_entry: FileEntry, strict: bool) -> Optional[FileEntry]:
         existing_entry = self.__files.get(file_entry.name)
         if existing_entry is None or (existing_entry.is_soft() and self.__options.force):
             self.__files[file_entry.name] = file_entry
             self.__dirty = True
+        elif existing_entry.is_soft() and self.__options.incremental:
+            if existing_entry.link != file_entry.link:
+                self.__files[file_entry.name] = file_entry
+                self.__dirty = True
         elif strict:
             raise ContextException(f"file already exists: {existing_entry}")
         return existing_entry
@@ -127,8 +207,9 @@ class SoftSyncContext:
                 self.__dirty = True
             else:
                 file_path = self.__full_path / existing_entry.name
-                if self.__options.force:
+                if self.__options.force or self.__options.incremental:
                     self.__root.scheme.delete(file_path)
+                    self.record_digest(existing_entry.name, None)
                 else:
                     raise ContextException(f"not removing real file: {file_path}")
         elif strict:
@@ -142,20 +223,30 @@ class SoftSyncContext:
                 context.__save()
 
     def __save(self) -> None:
-        if not self.__dirty or self.__options.dry_run:
+        if self.__options.dry_run:
             return
-        self.__root.scheme.mkdir(self.__full_path)
-        with self.__root.scheme.open(self.__manifest_file, mode='w') as file:
-            if self.__manifest is None:
-                self.__manifest = {}
-            entries: List[Dict[str, str]] = []
-            for entry in self.__files.values():
-                if entry.is_soft():
-                    entries.append(entry.json)
-            entries.sort(key=lambda e: e["name"])
-            self.__manifest[SOFTLINKS_KEY] = entries
-            json.dump(self.__manifest, file, indent=2)
+        if self.__digests_dirty:
+            from softsync.integrity import write_digests
+            self.__root.scheme.mkdir(self.__full_path)
+            write_digests(self.__root, self.__path, self.__digests)
+            self.__digests_dirty = False
+        if not self.__dirty:
+            return
+        with span("save", root=self.__root, dir=self.__path):
+            self.__root.scheme.mkdir(self.__full_path)
+            with self.__root.scheme.open(self.__manifest_file, mode='w') as file:
+                if self.__manifest is None:
+                    self.__manifest = {}
+                entries: List[Dict[str, str]] = []
+                for entry in self.__files.values():
+                    if entry.is_soft():
+                        entries.append(entry.json)
+                entries.sort(key=lambda e: e["name"])
+                self.__manifest[SOFTLINKS_KEY] = entries
+                json.dump(self.__manifest, file, indent=2)
         self.__dirty = False
+        if self.__root.listings is not None:
+            self.__root.listings.pop(self.__path, None)
 
     def relative_path_to(self, other: "SoftSyncContext") -> Path:
         if self.__root != other.__root:
@@ -172,7 +263,16 @@ class SoftSyncContext:
         return Path(*relative_path)
 
     def list_files(self, file_matcher: Optional[Union[str, Pattern, Callable]] = None) -> List[FileEntry]:
-        files: List[FileEntry] = list(self.__files.values())
+        return list(self.iter_files(file_matcher))
+
+    def iter_files(self, file_matcher: Optional[Union[str, Pattern, Callable]] = None) \
+            -> Generator[FileEntry, None, None]:
+        if isinstance(file_matcher, str) and not is_glob_pattern(file_matcher):
+            file = self.__lookup(file_matcher)
+            if file is not None:
+                yield file
+            return
+        self.__ensure_loaded()
         if file_matcher is not None:
             if isinstance(file_matcher, str):
                 file_pattern = re.compile(fnmatch.translate(file_matcher))
@@ -180,11 +280,11 @@ class SoftSyncContext:
             if isinstance(file_matcher, Pattern):
                 file_pattern = file_matcher
                 file_matcher = lambda e: file_pattern.match(e.name) is not None
-            if isinstance(file_matcher, Callable):
-                files = list(filter(file_matcher, files))
-            else:
+            if not isinstance(file_matcher, Callable):
                 raise ValueError(f"invalid type for file_matcher: {type(file_matcher)}")
-        return files
+        for file in self.__files.values():
+            if file_matcher is None or file_matcher(file):
+                yield file
 
     def dupe_file(self, src_file: FileEntry, src_ctx: "SoftSyncContext",
                   file_mapper: Optional[Union[str, Callable]] = None) -> None:
@@ -199,32 +299,124 @@ class SoftSyncContext:
             raise ValueError(f"invalid type for file_mapper: {type(file_mapper)}")
         link = relative_path.joinpath(src_file.name)
         file_entry = FileEntry(dest_file, link)
+        self.__ensure_loaded()
         self.__add_file_entry(file_entry, True)
 
-    def sync_file(self, src_file: FileEntry, src_ctx: "SoftSyncContext") -> None:
+    @property
+    def digests(self) -> Dict[str, str]:
+        if self.__digests is None:
+            from softsync.integrity import read_digests
+            self.__digests = read_digests(self.__root, self.__path) \
+                if self.__root.scheme.exists(self.__full_path) else {}
+        return self.__digests
+
+    def record_digest(self, file_name: str, digest: Optional[str]) -> None:
+        # digests may be recorded by concurrent syncs
+        with self.__digests_lock:
+            if digest is None:
+                if file_name in self.digests:
+                    del self.__digests[file_name]
+                    self.__digests_dirty = True
+            elif self.digests.get(file_name) != digest:
+                self.__digests[file_name] = digest
+                self.__digests_dirty = True
+
+    def stat_file(self, file: FileEntry) -> FileStat:
+        if file.is_soft():
+            raise ValueError(f"cannot stat softlink: {file}")
+        return self.__root.scheme.stat(self.__full_path / file.name)
+
+    def sync_file(self, src_file: FileEntry, src_ctx: "SoftSyncContext",
+                  synced: Optional[Dict[Tuple[Path, Path], bool]] = None,
+                  batch: Optional["SymlinkBatch"] = None) -> bool:
+        transfer = self.resolve_sync(src_file, src_ctx)
+        # softlinks aliasing an already synced real file only need their own entries, added on resolve
+        if synced is not None and transfer.key in synced:
+            return synced[transfer.key]
+        result = transfer.run(batch)
+        if synced is not None:
+            synced[transfer.key] = result
+        return result
+
+    def resolve_sync(self, src_file: FileEntry, src_ctx: "SoftSyncContext") -> "Transfer":
         if self.__root == src_ctx.__root:
             raise ValueError("contexts must not have the same root")
         original_src_file_name = src_file.name
-        src_ctx, dest_ctx, src_file_name = src_ctx.__resolve(original_src_file_name, self)
+        with span("resolve", dir=src_ctx.__path, file=original_src_file_name):
+            src_ctx, dest_ctx, src_file_name = src_ctx.__resolve(original_src_file_name, self)
         src_file = src_ctx.__full_path.joinpath(src_file_name)
         dest_file = dest_ctx.__full_path.joinpath(
             src_file_name if self.__options.reconstruct else original_src_file_name
         )
-        sync(src_file, src_ctx, dest_file, dest_ctx)
+        return Transfer(src_file, src_ctx, dest_file, dest_ctx)
 
     def rm_file(self, file: FileEntry) -> None:
         if self.__options.dry_run:
             return
+        self.__ensure_loaded()
         return self.__remove_file_entry(file, True)
 
+    def prefetch(self, files: Iterable[FileEntry], dest_ctx: Optional["SoftSyncContext"] = None,
+                 workers: int = PREFETCH_WORKERS) -> None:
+        # looks up the files that softlinks point to concurrently, one hop of the chains at a time,
+        # so that resolving them afterwards costs round trips in proportion to chain depth, not length
+        hops = [(self, file) for file in files if file.is_soft()]
+        if len(hops) == 0:
+            return
+        fetched = {self.__path}
+        executor = None
+        try:
+            while len(hops) > 0:
+                targets: Dict[Path, List[str]] = {}
+                for context, file in hops:
+                    try:
+                        path = resolve_path(context.__path / file.link.parent)
+                    except IndexError:
+                        continue  # reported when resolved
+                    targets.setdefault(path, []).append(file.link.name)
+                paths = [path for path in targets.keys() if path not in fetched]
+                fetched.update(paths)
+                if len(paths) <= 1:
+                    # a single directory is fetched in place, it gains nothing from a thread
+                    results = [self.__prefetch_path(path, targets[path], dest_ctx) for path in paths]
+                else:
+                    if executor is None:
+                        from concurrent.futures import ThreadPoolExecutor
+                        executor = ThreadPoolExecutor(max_workers=workers)
+                    results = executor.map(lambda p: self.__prefetch_path(p, targets[p], dest_ctx), paths)
+                hops = [hop for result in results for hop in result]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def __prefetch_path(self, path: Path, names: List[str], dest_ctx: Optional["SoftSyncContext"]) \
+            -> List[Tuple["SoftSyncContext", FileEntry]]:
+        # only the named files are looked up, so the directory is not listed unless it has to be
+        hops = []
+        try:
+            context = self.__context_for_path(path, True)
+            if self.__options.reconstruct and dest_ctx is not None:
+                dest_ctx.__context_for_path(path, False).__ensure_loaded()
+            for name in names:
+                file = context.__lookup(name)
+                if file is not None and file.is_soft():
+                    hops.append((context, file))
+        except SoftSyncException:
+            pass  # left for the resolve to report
+        return hops
+
     def __resolve(self, file_name: str, dest_ctx: "SoftSyncContext") -> ("SoftSyncContext", "SoftSyncContext", str):
-        file = self.__files.get(file_name, None)
+        file = self.__lookup(file_name)
         if file is None:
             raise ContextException(f"failed to resolve file: {file_name}, not found")
         if not file.is_soft():
             return self, dest_ctx, file.name
         if self.__options.reconstruct:
-            dest_ctx.__add_file_entry(file, True)
+            dest_ctx.__ensure_loaded()
+            # softlinks shared by several selected files are reached once for each of them
+            existing_entry = dest_ctx.__files.get(file.name)
+            if existing_entry is None or not existing_entry.is_soft() or existing_entry.link != file.link:
+                dest_ctx.__add_file_entry(file, True)
         link_path = file.link.parent
         link_name = file.link.name
         link_path = self.__path / link_path
@@ -242,7 +434,45 @@ class SoftSyncContext:
             return self
         context_for_path = self.__cache.get(path, None) if self.__cache is not None else None
         if context_for_path is None:
-            context_for_path = SoftSyncContext(self.__root, path, path_must_exist, self.__options, self.__cache)
+            context_for_path = SoftSyncContext(self.__root, path, path_must_exist, self.__options, self.__cache,
+                                               lazy=True)
             if self.__cache is not None:
                 self.__cache[path] = context_for_path
         return context_for_path
+
+
+class Transfer:
+
+    def __init__(self, src_file: Path, src_ctx: SoftSyncContext, dest_file: Path, dest_ctx: SoftSyncContext):
+        self.__src_file = src_file
+        self.__src_ctx = src_ctx
+        self.__dest_file = dest_file
+        self.__dest_ctx = dest_ctx
+
+    @property
+    def src_file(self) -> Path:
+        return self.__src_file
+
+    @property
+    def src_ctx(self) -> SoftSyncContext:
+        return self.__src_ctx
+
+    @property
+    def dest_file(self) -> Path:
+        return self.__dest_file
+
+    @property
+    def dest_ctx(self) -> SoftSyncContext:
+        return self.__dest_ctx
+
+    @property
+    def key(self) -> Tuple[Path, Path]:
+        return self.__src_file, self.__dest_file
+
+    def run(self, batch: Optional["SymlinkBatch"] = None) -> bool:
+        from softsync.sync import sync
+        with span("sync", src=self.__src_file, dest=self.__dest_file):
+            return sync(self.__src_file, self.__src_ctx, self.__dest_file, self.__dest_ctx, batch)
+
+    def __repr__(self) -> str:
+        return f"{self.__src_file} -> {self.__dest_file}"
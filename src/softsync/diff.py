@@ -0,0 +1,82 @@
+from enum import Enum
+from pathlib3x import Path
+
+from typing import Dict, Generator, Optional, Callable
+
+from softsync.common import Root, Options
+from softsync.common import is_modified
+from softsync.context import SoftSyncContext, FileEntry
+
+
+class Change(Enum):
+
+    ADDED = 1
+    REMOVED = 2
+    LINK = 3
+    CONTENT = 4
+
+
+class Difference:
+
+    def __init__(self, change: Change, path: Path,
+                 src_file: Optional[FileEntry], dest_file: Optional[FileEntry]):
+        self.__change = change
+        self.__path = path
+        self.__src_file = src_file
+        self.__dest_file = dest_file
+
+    @property
+    def change(self) -> Change:
+        return self.__change
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @property
+    def src_file(self) -> Optional[FileEntry]:
+        return self.__src_file
+
+    @property
+    def dest_file(self) -> Optional[FileEntry]:
+        return self.__dest_file
+
+    @property
+    def name(self) -> str:
+        return self.__src_file.name if self.__src_file is not None else self.__dest_file.name
+
+    def __repr__(self) -> str:
+        file = self.__src_file if self.__src_file is not None else self.__dest_file
+        return f"{self.change.name.lower()}: {self.path / str(file)}"
+
+
+def diff_contexts(src_ctx: SoftSyncContext, dest_ctx: SoftSyncContext,
+                  matcher: Optional[Callable] = None) -> Generator[Difference, None, None]:
+    dest_files: Dict[str, FileEntry] = {f.name: f for f in dest_ctx.list_files(matcher)}
+    for src_file in src_ctx.list_files(matcher):
+        dest_file = dest_files.pop(src_file.name, None)
+        if dest_file is None:
+            yield Difference(Change.ADDED, src_ctx.path, src_file, None)
+        elif src_file.is_soft() or dest_file.is_soft():
+            if src_file.link != dest_file.link:
+                yield Difference(Change.LINK, src_ctx.path, src_file, dest_file)
+        elif is_modified(src_ctx.stat_file(src_file), dest_ctx.stat_file(dest_file)):
+            yield Difference(Change.CONTENT, src_ctx.path, src_file, dest_file)
+    for dest_file in dest_files.values():
+        yield Difference(Change.REMOVED, dest_ctx.path, None, dest_file)
+
+
+def diff_roots(src_root: Root, dest_root: Root, path: Path = Path(""),
+               options: Options = Options(),
+               matcher: Optional[Callable] = None) -> Generator[Difference, None, None]:
+    src_ctx = SoftSyncContext(src_root, path, False, options)
+    dest_ctx = SoftSyncContext(dest_root, path, False, options)
+    yield from diff_contexts(src_ctx, dest_ctx, matcher)
+    if options.recursive:
+        dirs = set()
+        for root in (src_root, dest_root):
+            full_path = root.path / path
+            if root.scheme.exists(full_path):
+                dirs.update(d.name for d in root.scheme.list_dirs(full_path))
+        for name in sorted(dirs):
+            yield from diff_roots(src_root, dest_root, path / name, options, matcher)
@@ -0,0 +1,117 @@
+import json
+import hashlib
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from pathlib3x import Path
+
+from typing import List, Dict, Generator
+
+from softsync.common import Root, Options
+from softsync.context import INTEGRITY_FILENAME
+from softsync.exception import SyncException
+
+ALGORITHM_KEY = "algorithm"
+DIGESTS_KEY = "digests"
+DIGEST_ALGORITHM = "sha256"
+CHUNK_SIZE = 1024 * 1024
+
+
+class Integrity(Enum):
+
+    OK = 1
+    CORRUPT = 2
+    MISSING = 3
+
+
+class IntegrityCheck:
+
+    def __init__(self, integrity: Integrity, path: Path, name: str):
+        self.__integrity = integrity
+        self.__path = path
+        self.__name = name
+
+    @property
+    def integrity(self) -> Integrity:
+        return self.__integrity
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    def __repr__(self) -> str:
+        return f"{self.integrity.name.lower()}: {self.path / self.name}"
+
+
+def copy_hashed(src_root: Root, src_file: Path, dest_root: Root, dest_file: Path,
+                algorithm: str = DIGEST_ALGORITHM) -> str:
+    # the digest is taken from the bytes as they are written, so the copy costs just the one read
+    digest = hashlib.new(algorithm)
+    size = 0
+    with src_root.scheme.open(src_file, mode='rb') as src, dest_root.scheme.open(dest_file, mode='wb') as dest:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dest.write(chunk)
+            size += len(chunk)
+    check_copied_size(dest_root, dest_file, size)
+    return digest.hexdigest()
+
+
+def check_copied_size(root: Root, file: Path, size: int) -> None:
+    if root.scheme.stat(file).size != size:
+        raise SyncException(f"failed to verify file: {file}, size mismatch")
+
+
+def hash_file(root: Root, file: Path, algorithm: str = DIGEST_ALGORITHM) -> str:
+    digest = hashlib.new(algorithm)
+    with root.scheme.open(file, mode='rb') as src:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_digests(root: Root, path: Path) -> Dict[str, str]:
+    integrity_file = root.path / path / INTEGRITY_FILENAME
+    if not root.scheme.exists(integrity_file):
+        return {}
+    with root.scheme.open(integrity_file, mode='r') as file:
+        integrity = json.load(file)
+    if integrity.get(ALGORITHM_KEY) != DIGEST_ALGORITHM:
+        raise ValueError(f"unsupported digest algorithm: {integrity.get(ALGORITHM_KEY)}, in: {path}")
+    return integrity.get(DIGESTS_KEY, {})
+
+
+def write_digests(root: Root, path: Path, digests: Dict[str, str]) -> None:
+    integrity_file = root.path / path / INTEGRITY_FILENAME
+    if len(digests) == 0:
+        if root.scheme.exists(integrity_file):
+            root.scheme.delete(integrity_file)
+        return
+    with root.scheme.open(integrity_file, mode='w') as file:
+        json.dump({
+            ALGORITHM_KEY: DIGEST_ALGORITHM,
+            DIGESTS_KEY: dict(sorted(digests.items())),
+        }, file, indent=2)
+
+
+def verify_dirs(root: Root, paths: List[Path], options: Options = Options()) -> Generator[IntegrityCheck, None, None]:
+    checks = [(path, name, digest) for path in paths for name, digest in read_digests(root, path).items()]
+    with ThreadPoolExecutor(max_workers=options.jobs) as executor:
+        yield from executor.map(lambda check: __verify_file(root, *check), checks)
+
+
+def __verify_file(root: Root, path: Path, name: str, digest: str) -> IntegrityCheck:
+    file = root.path / path / name
+    if not root.scheme.is_file(file):
+        return IntegrityCheck(Integrity.MISSING, path, name)
+    integrity = Integrity.OK if hash_file(root, file) == digest else Integrity.CORRUPT
+    return IntegrityCheck(integrity, path, name)
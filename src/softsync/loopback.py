@@ -0,0 +1,185 @@
+import os
+import time
+import shutil
+from collections import namedtuple
+from contextlib import contextmanager
+from threading import Lock
+from pathlib3x import Path
+
+from typing import Generator, ContextManager, IO
+
+from softsync.common import FILE_SCHEME, Root, Sync
+from softsync.scheme import StorageScheme, FileStat, LOOPBACK_SCHEME
+from softsync.scheme import parse_params
+from softsync.sync import StorageSync
+from softsync.exception import SchemeException, SyncException
+
+
+# stands in for the client of a remote storage service, backed by the local filesystem,
+# paying a configurable set-up latency per connection and counting the connections made
+class LoopbackClient:
+
+    __LOCK = Lock()
+    __CONNECTS = 0
+
+    @staticmethod
+    def connects() -> int:
+        return LoopbackClient.__CONNECTS
+
+    def __init__(self, latency: float = 0.0):
+        if latency > 0:
+            time.sleep(latency)
+        with LoopbackClient.__LOCK:
+            LoopbackClient.__CONNECTS += 1
+        self.__open = True
+
+    def __check(self) -> None:
+        if not self.__open:
+            raise ConnectionError("client is closed")
+
+    def close(self) -> None:
+        self.__open = False
+
+    def exists(self, path: Path) -> bool:
+        self.__check()
+        return path.exists()
+
+    def is_dir(self, path: Path) -> bool:
+        self.__check()
+        return path.is_dir()
+
+    def is_file(self, path: Path) -> bool:
+        self.__check()
+        return path.is_file()
+
+    def stat(self, path: Path) -> os.stat_result:
+        self.__check()
+        return path.stat()
+
+    def list(self, path: Path) -> Generator[Path, None, None]:
+        self.__check()
+        return Path(path).iterdir()
+
+    def mkdir(self, path: Path) -> None:
+        self.__check()
+        path.mkdir(exist_ok=True)
+
+    def open(self, path: Path, mode: str) -> IO:
+        self.__check()
+        return path.open(mode=mode)
+
+    def delete(self, path: Path) -> None:
+        self.__check()
+        path.unlink()
+
+    def copy(self, src_file: Path, dest_file: Path) -> None:
+        self.__check()
+        shutil.copyfile(src_file, dest_file)
+
+
+class LoopbackStorageScheme(StorageScheme):
+
+    def __init__(self, url: namedtuple):
+        if url.params or url.fragment:
+            raise SchemeException(f"invalid root, failed to parse: {url}")
+        super().__init__(url)
+        params = parse_params(url, latency=0.0, max_connections=self.MAX_CONNECTIONS, keep_alive=self.KEEP_ALIVE)
+        self.__latency = params["latency"]
+        self.__max_connections = params["max_connections"]
+        self.__keep_alive = params["keep_alive"]
+
+    @property
+    def max_connections(self) -> int:
+        return self.__max_connections
+
+    @property
+    def keep_alive(self) -> float:
+        return self.__keep_alive
+
+    def resolve_root(self, url: namedtuple) -> (str, Path, str):
+        path = Path(f"{url.netloc}{url.path}").resolve()
+        mount = f"{LOOPBACK_SCHEME}:{id(self)}"
+        location = str(path)
+        return mount, path, location
+
+    def connect(self) -> LoopbackClient:
+        return LoopbackClient(self.__latency)
+
+    def disconnect(self, connection: LoopbackClient) -> None:
+        connection.close()
+
+    def exists(self, path: Path) -> bool:
+        with self.connection() as client:
+            return client.exists(path)
+
+    def is_dir(self, path: Path) -> bool:
+        with self.connection() as client:
+            return client.is_dir(path)
+
+    def is_file(self, path: Path) -> bool:
+        with self.connection() as client:
+            return client.is_file(path)
+
+    def stat(self, path: Path) -> FileStat:
+        with self.connection() as client:
+            stat = client.stat(path)
+            return FileStat(stat.st_size, stat.st_mtime)
+
+    def list_files(self, path: Path) -> Generator[Path, None, None]:
+        with self.connection() as client:
+            entries = [e for e in client.list(path) if client.is_file(e)]
+        yield from entries
+
+    def list_dirs(self, path: Path) -> Generator[Path, None, None]:
+        with self.connection() as client:
+            entries = [e for e in client.list(path) if client.is_dir(e)]
+        yield from entries
+
+    def mkdir(self, path: Path) -> None:
+        with self.connection() as client:
+            client.mkdir(path)
+
+    @contextmanager
+    def open(self, path: Path, mode: str) -> ContextManager[IO]:
+        with self.connection() as client:
+            with client.open(path, mode) as file:
+                yield file
+
+    def delete(self, path) -> None:
+        with self.connection() as client:
+            client.delete(path)
+
+
+class LoopbackStorageSync(StorageSync):
+
+    def __init__(self, src_scheme: str, dest_scheme: str):
+        pass
+
+    def symlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        raise NotImplementedError()
+
+    def hardlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        raise NotImplementedError()
+
+    def copy(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        # a transfer holds a connection to the loopback end(s) for its duration
+        root = src_root if src_root.scheme.name == LOOPBACK_SCHEME else dest_root
+        with root.scheme.connection() as client:
+            if src_root.scheme.name == LOOPBACK_SCHEME and dest_root.scheme.name == LOOPBACK_SCHEME:
+                with dest_root.scheme.connection():
+                    client.copy(src_file, dest_file)
+            else:
+                client.copy(src_file, dest_file)
+
+    def sync(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path, *modes: Sync) -> None:
+        if not modes or Sync.COPY in modes:
+            self.copy(src_root, src_file, dest_root, dest_file)
+            return
+        raise SyncException(f"failed to sync file: {src_file}")
+
+
+# register loopback:// storage scheme and syncs
+StorageScheme.register_scheme(LOOPBACK_SCHEME, LoopbackStorageScheme)
+StorageSync.register_sync(LOOPBACK_SCHEME, LOOPBACK_SCHEME, LoopbackStorageSync)
+StorageSync.register_sync(LOOPBACK_SCHEME, FILE_SCHEME, LoopbackStorageSync)
+StorageSync.register_sync(FILE_SCHEME, LOOPBACK_SCHEME, LoopbackStorageSync)
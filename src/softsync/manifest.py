@@ -0,0 +1,130 @@
+import re
+import json
+
+from typing import IO, Dict, Generator, Optional, Any
+
+CHUNK_SIZE = 64 * 1024
+# manifests smaller than this are decoded whole, which is much faster, larger ones are streamed
+STREAM_SIZE = 32 * 1024 * 1024
+
+
+class ManifestReader:
+
+    __WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, file: IO[str], list_key: str, chunk_size: int = CHUNK_SIZE, stream_size: int = STREAM_SIZE):
+        self.__file = file
+        self.__list_key = list_key
+        self.__chunk_size = chunk_size
+        self.__stream_size = stream_size
+        self.__decoder = json.JSONDecoder()
+        self.__buffer = ""
+        self.__pos = 0
+        self.__eof = False
+        self.__manifest: Optional[Dict[str, Any]] = None
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if self.__manifest is None:
+            raise ValueError("manifest not read yet")
+        return self.__manifest
+
+    def __iter__(self) -> Generator[Dict[str, Any], None, None]:
+        self.__buffer = self.__file.read(self.__stream_size)
+        if len(self.__buffer) < self.__stream_size:
+            self.__eof = True
+            yield from self.__decode()
+        else:
+            yield from self.__stream()
+
+    def __decode(self) -> Generator[Dict[str, Any], None, None]:
+        manifest = json.loads(self.__buffer)
+        self.__buffer = ""
+        if not isinstance(manifest, dict):
+            raise json.JSONDecodeError("expected '{'", "", 0)
+        entries = manifest.get(self.__list_key, None)
+        if isinstance(entries, list):
+            manifest[self.__list_key] = None
+            yield from entries
+        self.__manifest = manifest
+
+    def __stream(self) -> Generator[Dict[str, Any], None, None]:
+        manifest = {}
+        self.__expect("{")
+        if self.__peek() == "}":
+            self.__pos += 1
+        else:
+            while True:
+                key = self.__value()
+                if not isinstance(key, str):
+                    self.__fail("expected string key")
+                self.__expect(":")
+                if key == self.__list_key and self.__peek() == "[":
+                    manifest[key] = None
+                    yield from self.__items()
+                else:
+                    manifest[key] = self.__value()
+                char = self.__next()
+                if char == "}":
+                    break
+                if char != ",":
+                    self.__fail("expected ',' or '}'")
+        if self.__peek() is not None:
+            self.__fail("extra data")
+        self.__manifest = manifest
+
+    def __items(self) -> Generator[Any, None, None]:
+        self.__expect("[")
+        if self.__peek() == "]":
+            self.__pos += 1
+            return
+        while True:
+            yield self.__value()
+            char = self.__next()
+            if char == "]":
+                return
+            if char != ",":
+                self.__fail("expected ',' or ']'")
+
+    def __value(self) -> Any:
+        self.__peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+                # a value running up to the end of the buffer may have been cut short
+                if end < len(self.__buffer) or self.__eof:
+                    self.__pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+            self.__fill()
+
+    def __peek(self) -> Optional[str]:
+        while True:
+            self.__pos = ManifestReader.__WHITESPACE.match(self.__buffer, self.__pos).end()
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+            if self.__eof:
+                return None
+            self.__fill()
+
+    def __next(self) -> Optional[str]:
+        char = self.__peek()
+        if char is not None:
+            self.__pos += 1
+        return char
+
+    def __expect(self, char: str) -> None:
+        if self.__next() != char:
+            self.__fail(f"expected '{char}'")
+
+    def __fill(self) -> None:
+        chunk = self.__file.read(self.__chunk_size)
+        self.__buffer = self.__buffer[self.__pos:] + chunk
+        self.__pos = 0
+        if not chunk:
+            self.__eof = True
+
+    def __fail(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self.__buffer, self.__pos)
@@ -0,0 +1,269 @@
+import io
+import time
+import random
+import posixpath
+from collections import namedtuple
+from contextlib import contextmanager
+from threading import Lock, RLock
+from pathlib3x import Path
+
+from typing import Dict, Set, List, Generator, ContextManager, IO
+
+from softsync.common import FILE_SCHEME, Root, Sync
+from softsync.scheme import StorageScheme, FileStat, MEM_SCHEME
+from softsync.scheme import parse_params
+from softsync.sync import StorageSync
+from softsync.exception import SchemeException, SyncException
+
+CHUNK_SIZE = 1024 * 1024
+ENCODING = "utf-8"
+
+
+class MemoryFile:
+
+    def __init__(self, data: bytes = b""):
+        self.data = data
+        self.mtime = time.time()
+
+
+class MemoryStore:
+
+    __LOCK = Lock()
+    __STORES: Dict[str, "MemoryStore"] = {}
+
+    @staticmethod
+    def for_name(name: str) -> "MemoryStore":
+        with MemoryStore.__LOCK:
+            store = MemoryStore.__STORES.get(name, None)
+            if store is None:
+                store = MemoryStore()
+                MemoryStore.__STORES[name] = store
+            return store
+
+    @staticmethod
+    def drop(name: str) -> None:
+        with MemoryStore.__LOCK:
+            MemoryStore.__STORES.pop(name, None)
+
+    def __init__(self):
+        self.__lock = RLock()
+        self.__dirs: Dict[str, Set[str]] = {"/": set()}
+        self.__dir_mtimes: Dict[str, float] = {"/": time.time()}
+        self.__files: Dict[str, MemoryFile] = {}
+
+    def exists(self, path: str) -> bool:
+        return path in self.__dirs or path in self.__files
+
+    def is_dir(self, path: str) -> bool:
+        return path in self.__dirs
+
+    def is_file(self, path: str) -> bool:
+        return path in self.__files
+
+    def stat(self, path: str) -> FileStat:
+        with self.__lock:
+            file = self.__files.get(path, None)
+            if file is not None:
+                return FileStat(len(file.data), file.mtime)
+            if path in self.__dirs:
+                return FileStat(0, self.__dir_mtimes[path])
+        raise FileNotFoundError(f"no such file or directory: {path}")
+
+    def list(self, path: str) -> List[str]:
+        with self.__lock:
+            children = self.__dirs.get(path, None)
+            if children is None:
+                raise FileNotFoundError(f"no such directory: {path}")
+            return sorted(children)
+
+    def mkdir(self, path: str, parents: bool = False) -> None:
+        with self.__lock:
+            if path in self.__dirs:
+                return
+            if path in self.__files:
+                raise FileExistsError(f"file exists: {path}")
+            parent = posixpath.dirname(path)
+            if parent not in self.__dirs:
+                if not parents:
+                    raise FileNotFoundError(f"no such directory: {parent}")
+                self.mkdir(parent, parents)
+            self.__dirs[path] = set()
+            self.__dir_mtimes[path] = time.time()
+            self.__add_child(path)
+
+    def read(self, path: str) -> bytes:
+        file = self.__files.get(path, None)
+        if file is None:
+            raise FileNotFoundError(f"no such file: {path}")
+        return file.data
+
+    def write(self, path: str, data: bytes) -> None:
+        with self.__lock:
+            if path in self.__dirs:
+                raise IsADirectoryError(f"is a directory: {path}")
+            file = self.__files.get(path, None)
+            if file is None:
+                self.__check_parent(path)
+                self.__files[path] = MemoryFile(data)
+                self.__add_child(path)
+            else:
+                # written in place, so that any hardlinks see the new data too
+                file.data = data
+                file.mtime = time.time()
+
+    def link(self, src_path: str, dest_path: str) -> None:
+        with self.__lock:
+            file = self.__files.get(src_path, None)
+            if file is None:
+                raise FileNotFoundError(f"no such file: {src_path}")
+            if self.exists(dest_path):
+                raise FileExistsError(f"file exists: {dest_path}")
+            self.__check_parent(dest_path)
+            self.__files[dest_path] = file
+            self.__add_child(dest_path)
+
+    def delete(self, path: str) -> None:
+        with self.__lock:
+            if path in self.__dirs:
+                raise IsADirectoryError(f"is a directory: {path}")
+            if self.__files.pop(path, None) is None:
+                raise FileNotFoundError(f"no such file: {path}")
+            parent = posixpath.dirname(path)
+            self.__dirs[parent].discard(posixpath.basename(path))
+            self.__dir_mtimes[parent] = time.time()
+
+    def __check_parent(self, path: str) -> None:
+        parent = posixpath.dirname(path)
+        if parent not in self.__dirs:
+            raise FileNotFoundError(f"no such directory: {parent}")
+
+    def __add_child(self, path: str) -> None:
+        parent = posixpath.dirname(path)
+        self.__dirs[parent].add(posixpath.basename(path))
+        self.__dir_mtimes[parent] = time.time()
+
+
+class MemoryStorageScheme(StorageScheme):
+
+    PROCESS_LOCAL = True
+
+    def __init__(self, url: namedtuple):
+        if url.params or url.fragment:
+            raise SchemeException(f"invalid root, failed to parse: {url}")
+        super().__init__(url)
+        params = parse_params(url, latency=0.0, failure_rate=0.0, seed=-1)
+        self.__latency = params["latency"]
+        self.__failure_rate = params["failure_rate"]
+        self.__random = random.Random(params["seed"] if params["seed"] >= 0 else None)
+        self.__store = MemoryStore.for_name(url.netloc)
+
+    @property
+    def store(self) -> MemoryStore:
+        return self.__store
+
+    def resolve_root(self, url: namedtuple) -> (str, Path, str):
+        path = Path(posixpath.normpath("/" + url.path.lstrip("/")))
+        # memory roots spring into being, as there is no other way to create them
+        self.__store.mkdir(path.as_posix(), parents=True)
+        mount = url.netloc
+        location = f"{url.netloc}{path.as_posix()}"
+        return mount, path, location
+
+    def exists(self, path: Path) -> bool:
+        self.__io("exists", path)
+        return self.__store.exists(path.as_posix())
+
+    def is_dir(self, path: Path) -> bool:
+        self.__io("is_dir", path)
+        return self.__store.is_dir(path.as_posix())
+
+    def is_file(self, path: Path) -> bool:
+        self.__io("is_file", path)
+        return self.__store.is_file(path.as_posix())
+
+    def stat(self, path: Path) -> FileStat:
+        self.__io("stat", path)
+        return self.__store.stat(path.as_posix())
+
+    def list_files(self, path: Path) -> Generator[Path, None, None]:
+        self.__io("list_files", path)
+        for name in self.__store.list(path.as_posix()):
+            if self.__store.is_file(posixpath.join(path.as_posix(), name)):
+                yield path / name
+
+    def list_dirs(self, path: Path) -> Generator[Path, None, None]:
+        self.__io("list_dirs", path)
+        for name in self.__store.list(path.as_posix()):
+            if self.__store.is_dir(posixpath.join(path.as_posix(), name)):
+                yield path / name
+
+    def mkdir(self, path: Path) -> None:
+        self.__io("mkdir", path)
+        self.__store.mkdir(path.as_posix())
+
+    @contextmanager
+    def open(self, path: Path, mode: str) -> ContextManager[IO]:
+        self.__io("open", path)
+        binary = "b" in mode
+        if "r" in mode:
+            data = self.__store.read(path.as_posix())
+            yield io.BytesIO(data) if binary else io.StringIO(data.decode(ENCODING))
+        elif "w" in mode:
+            buffer = io.BytesIO() if binary else io.StringIO()
+            yield buffer
+            data = buffer.getvalue()
+            self.__store.write(path.as_posix(), data if binary else data.encode(ENCODING))
+        else:
+            raise ValueError(f"unsupported mode: {mode}")
+
+    def delete(self, path) -> None:
+        self.__io("delete", path)
+        self.__store.delete(path.as_posix())
+
+    def __io(self, op: str, path: Path) -> None:
+        # stands in for the cost, and the unreliability, of a remote call
+        if self.__latency > 0:
+            time.sleep(self.__latency)
+        if self.__failure_rate > 0 and self.__random.random() < self.__failure_rate:
+            raise ConnectionError(f"injected failure: {op}: {path}")
+
+
+class MemoryStorageSync(StorageSync):
+
+    def __init__(self, src_scheme: str, dest_scheme: str):
+        pass
+
+    def symlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        raise NotImplementedError()
+
+    def hardlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        # memory roots are mounted on the store that backs them
+        MemoryStore.for_name(dest_root.mount).link(src_file.as_posix(), dest_file.as_posix())
+
+    def copy(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        with src_root.scheme.open(src_file, mode='rb') as src, dest_root.scheme.open(dest_file, mode='wb') as dest:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dest.write(chunk)
+
+    def sync(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path, *modes: Sync) -> None:
+        if not modes:
+            modes = (Sync.HARDLINK, Sync.COPY)
+        for mode in modes:
+            if mode == Sync.HARDLINK:
+                if src_root.scheme.name == dest_root.scheme.name == MEM_SCHEME and src_root.mount == dest_root.mount:
+                    self.hardlink(src_root, src_file, dest_root, dest_file)
+                    return
+            if mode == Sync.COPY:
+                self.copy(src_root, src_file, dest_root, dest_file)
+                return
+        raise SyncException(f"failed to sync file: {src_file}")
+
+
+# register mem:// storage scheme and syncs
+StorageScheme.register_scheme(MEM_SCHEME, MemoryStorageScheme)
+StorageSync.register_sync(MEM_SCHEME, MEM_SCHEME, MemoryStorageSync)
+StorageSync.register_sync(MEM_SCHEME, FILE_SCHEME, MemoryStorageSync)
+StorageSync.register_sync(FILE_SCHEME, MEM_SCHEME, MemoryStorageSync)
@@ -0,0 +1,119 @@
+import time
+import errno
+import random
+from threading import Lock, local
+
+from typing import Optional, Callable, Any
+
+TRANSIENT_ERRNOS = {
+    errno.EAGAIN,
+    errno.EBUSY,
+    errno.EINTR,
+    errno.ESTALE,
+    errno.ETIMEDOUT,
+    errno.ECONNABORTED,
+    errno.ECONNREFUSED,
+    errno.ECONNRESET,
+    errno.EHOSTUNREACH,
+    errno.ENETDOWN,
+    errno.ENETUNREACH,
+}
+
+
+def is_transient(e: BaseException) -> bool:
+    if isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    return isinstance(e, OSError) and e.errno in TRANSIENT_ERRNOS
+
+
+class RateLimiter:
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"invalid rate: {rate}")
+        self.__rate = rate
+        self.__burst = burst if burst is not None else rate
+        self.__tokens = self.__burst
+        self.__updated = time.monotonic()
+        self.__lock = Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.__rate
+
+    def acquire(self, amount: float = 1) -> None:
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.__burst, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+            # go into debt for amounts larger than the burst, later callers then wait it off
+            self.__tokens -= amount
+            wait = -self.__tokens / self.__rate if self.__tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class Policy:
+
+    def __init__(self,
+                 retries: int = 3,
+                 backoff: float = 0.1,
+                 max_backoff: float = 10.0,
+                 ops_per_sec: Optional[float] = None,
+                 bytes_per_sec: Optional[float] = None,
+                 classifier: Callable[[BaseException], bool] = is_transient,
+                 ):
+        if retries < 0:
+            raise ValueError(f"invalid retries: {retries}")
+        self.__retries = retries
+        self.__backoff = backoff
+        self.__max_backoff = max_backoff
+        self.__ops = RateLimiter(ops_per_sec) if ops_per_sec is not None else None
+        self.__bytes = RateLimiter(bytes_per_sec) if bytes_per_sec is not None else None
+        self.__classifier = classifier
+        self.__calling = local()
+
+    @property
+    def retries(self) -> int:
+        return self.__retries
+
+    @property
+    def limits_bytes(self) -> bool:
+        return self.__bytes is not None
+
+    def call(self, fn: Callable, *args,
+             size: int = 0, on_retry: Optional[Callable[[], None]] = None, **kwargs) -> Any:
+        # calls made within a call, e.g. the storage operations of a sync, are retried and limited as part of it
+        if getattr(self.__calling, "active", False):
+            return fn(*args, **kwargs)
+        attempt = 0
+        while True:
+            if self.__ops is not None:
+                self.__ops.acquire()
+            if self.__bytes is not None and size > 0:
+                self.__bytes.acquire(size)
+            self.__calling.active = True
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.__retries or not self.__classifier(e):
+                    raise
+            finally:
+                self.__calling.active = False
+            delay = min(self.__max_backoff, self.__backoff * (2 ** attempt))
+            time.sleep(random.uniform(delay / 2, delay))
+            attempt += 1
+            if on_retry is not None:
+                on_retry()
+
+
+__POLICY: Optional[Policy] = None
+
+
+def set_policy(policy: Optional[Policy]) -> None:
+    global __POLICY
+    __POLICY = policy
+
+
+def get_policy() -> Optional[Policy]:
+    return __POLICY
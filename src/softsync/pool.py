@@ -0,0 +1,96 @@
+import time
+from contextlib import contextmanager
+from threading import Condition
+
+from typing import List, Tuple, Callable, Generator, Any
+
+from softsync.policy import is_transient
+from softsync.exception import SchemeException
+
+
+class ResourcePool:
+
+    def __init__(self,
+                 connect: Callable[[], Any],
+                 disconnect: Callable[[Any], None],
+                 max_size: int = 8,
+                 keep_alive: float = 60.0,
+                 ):
+        if max_size < 1:
+            raise ValueError(f"invalid max pool size: {max_size}")
+        self.__connect = connect
+        self.__disconnect = disconnect
+        self.__max_size = max_size
+        self.__keep_alive = keep_alive
+        self.__idle: List[Tuple[Any, float]] = []
+        self.__size = 0
+        self.__closed = False
+        self.__condition = Condition()
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def idle(self) -> int:
+        return len(self.__idle)
+
+    @contextmanager
+    def acquire(self) -> Generator[Any, None, None]:
+        resource = self.__take()
+        try:
+            yield resource
+        except BaseException as e:
+            # a transient failure may have left the resource broken, so it is not reused
+            self.__give_back(resource, not is_transient(e))
+            raise
+        self.__give_back(resource, True)
+
+    def close(self) -> None:
+        with self.__condition:
+            self.__closed = True
+            idle, self.__idle = self.__idle, []
+            self.__size -= len(idle)
+            self.__condition.notify_all()
+        for resource, _ in idle:
+            self.__disconnect(resource)
+
+    def __take(self) -> Any:
+        expired = []
+        try:
+            with self.__condition:
+                while True:
+                    if self.__closed:
+                        raise SchemeException("resource pool is closed")
+                    now = time.monotonic()
+                    while len(self.__idle) > 0:
+                        resource, since = self.__idle.pop()
+                        if now - since <= self.__keep_alive:
+                            return resource
+                        self.__size -= 1
+                        expired.append(resource)
+                    if self.__size < self.__max_size:
+                        self.__size += 1
+                        break
+                    self.__condition.wait()
+        finally:
+            for resource in expired:
+                self.__disconnect(resource)
+        try:
+            return self.__connect()
+        except BaseException:
+            with self.__condition:
+                self.__size -= 1
+                self.__condition.notify()
+            raise
+
+    def __give_back(self, resource: Any, reuse: bool) -> None:
+        with self.__condition:
+            reuse = reuse and not self.__closed
+            if reuse:
+                self.__idle.append((resource, time.monotonic()))
+            else:
+                self.__size -= 1
+            self.__condition.notify()
+        if not reuse:
+            self.__disconnect(resource)
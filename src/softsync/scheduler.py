@@ -0,0 +1,152 @@
+import heapq
+from enum import Enum
+from collections import deque
+from itertools import count
+from threading import Thread, Condition
+
+from typing import Dict, Tuple, Optional, Callable, Generator, Any
+
+LARGE_FILE_SIZE = 16 * 1024 * 1024
+
+
+class Queue(Enum):
+
+    METADATA = 1
+    SMALL = 2
+    LARGE = 3
+
+
+# each worker has a home queue, and steals from the others, in this order, when its own has nothing it can run;
+# the second worker is at home on the large queue, so that any two workers start the largest transfers first
+__STEAL_ORDERS = (
+    (Queue.METADATA, Queue.SMALL, Queue.LARGE),
+    (Queue.LARGE, Queue.SMALL, Queue.METADATA),
+    (Queue.SMALL, Queue.METADATA, Queue.LARGE),
+)
+
+
+def steal_order(worker: int) -> Tuple[Queue, ...]:
+    return __STEAL_ORDERS[worker % len(__STEAL_ORDERS)]
+
+
+def queue_for_size(size: int) -> Queue:
+    return Queue.LARGE if size >= LARGE_FILE_SIZE else Queue.SMALL
+
+
+class Scheduler:
+
+    def __init__(self, workers: int, limits: Optional[Dict[Queue, int]] = None):
+        if workers < 1:
+            raise ValueError(f"invalid number of workers: {workers}")
+        # large transfers may never hold every worker, so that small ones keep flowing past them
+        self.__limits = {
+            Queue.METADATA: workers,
+            Queue.SMALL: workers,
+            Queue.LARGE: max(1, workers // 2),
+        }
+        if limits is not None:
+            self.__limits.update(limits)
+        # the large queue is a heap, so that the largest transfers are started first
+        self.__pending = {
+            Queue.METADATA: deque(),
+            Queue.SMALL: deque(),
+            Queue.LARGE: [],
+        }
+        self.__running = {queue: 0 for queue in Queue}
+        self.__sequence = count()
+        self.__results = deque()
+        self.__outstanding = 0
+        self.__error: Optional[BaseException] = None
+        self.__closed = False
+        self.__condition = Condition()
+        self.__threads = [
+            Thread(target=self.__work, args=(steal_order(worker),), daemon=True)
+            for worker in range(workers)
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.shutdown(cancel=exc_type is not None)
+        return False
+
+    def submit(self, queue: Queue, fn: Callable, *args, size: int = 0, tag: Any = None) -> None:
+        with self.__condition:
+            if self.__closed:
+                raise ValueError("scheduler is shut down")
+            task = (fn, args, tag)
+            if queue == Queue.LARGE:
+                heapq.heappush(self.__pending[queue], (-size, next(self.__sequence), task))
+            else:
+                self.__pending[queue].append(task)
+            self.__outstanding += 1
+            self.__condition.notify_all()
+
+    def results(self) -> Generator[Tuple[Any, Any], None, None]:
+        # yields (tag, result) for each task as it completes, raising the first failure, if any
+        while True:
+            with self.__condition:
+                while len(self.__results) == 0 and self.__outstanding > 0 and self.__error is None:
+                    self.__condition.wait()
+                if self.__error is not None:
+                    raise self.__error
+                if len(self.__results) == 0:
+                    return
+                result = self.__results.popleft()
+            yield result
+
+    def shutdown(self, cancel: bool = False) -> None:
+        with self.__condition:
+            self.__closed = True
+            if cancel:
+                self.__cancel()
+            self.__condition.notify_all()
+        for thread in self.__threads:
+            thread.join()
+
+    def __work(self, order: Tuple[Queue, ...]) -> None:
+        while True:
+            with self.__condition:
+                while True:
+                    queue = self.__next_queue(order)
+                    if queue is not None:
+                        break
+                    if self.__closed and not any(len(p) > 0 for p in self.__pending.values()):
+                        return
+                    self.__condition.wait()
+                if queue == Queue.LARGE:
+                    _, _, task = heapq.heappop(self.__pending[queue])
+                else:
+                    task = self.__pending[queue].popleft()
+                self.__running[queue] += 1
+            fn, args, tag = task
+            error = None
+            result = None
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                error = e
+            with self.__condition:
+                self.__running[queue] -= 1
+                self.__outstanding -= 1
+                if error is not None:
+                    if self.__error is None:
+                        self.__error = error
+                    self.__cancel()
+                else:
+                    self.__results.append((tag, result))
+                self.__condition.notify_all()
+
+    def __next_queue(self, order: Tuple[Queue, ...]) -> Optional[Queue]:
+        for queue in order:
+            if len(self.__pending[queue]) > 0 and self.__running[queue] < self.__limits[queue]:
+                return queue
+        return None
+
+    def __cancel(self) -> None:
+        for pending in self.__pending.values():
+            self.__outstanding -= len(pending)
+            pending.clear()
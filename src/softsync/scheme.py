@@ -1,16 +1,53 @@
+import atexit
 from abc import ABC, abstractmethod
 from collections import namedtuple
+from contextlib import contextmanager, ExitStack
+from importlib import import_module
+from threading import Lock
+from weakref import WeakSet
+from urllib.parse import parse_qs
 from pathlib3x import Path
 
-from typing import Dict, Generator, Type, TypeVar, ContextManager, IO
+from typing import Dict, Generator, Type, TypeVar, ContextManager, IO, Optional, Any
 
+from softsync.policy import Policy, get_policy
+from softsync.pool import ResourcePool
 from softsync.exception import SchemeException
 
 
+FILE_SCHEME = "file"
+LOOPBACK_SCHEME = "loopback"
+MEM_SCHEME = "mem"
+
+FileStat = namedtuple("FileStat", ["size", "mtime"])
+
+
+def parse_params(url: namedtuple, **defaults: Any) -> Dict[str, Any]:
+    try:
+        query = {k: v[-1] for k, v in parse_qs(url.query, strict_parsing=bool(url.query)).items()}
+        params = {k: type(d)(query.pop(k)) if k in query else d for k, d in defaults.items()}
+    except ValueError as e:
+        raise SchemeException(f"invalid root, failed to parse: {url}: {e}")
+    if len(query) > 0:
+        raise SchemeException(f"invalid root, unknown parameters: {', '.join(query.keys())}")
+    return params
+
+
 class StorageScheme(ABC):
 
     S = TypeVar("S", bound="StorageScheme")
     __SCHEME_TYPES: Dict[str, Type[S]] = {}
+    # modules that register a scheme when imported, for schemes that are not always needed
+    __SCHEME_MODULES: Dict[str, str] = {
+        LOOPBACK_SCHEME: "softsync.loopback",
+        MEM_SCHEME: "softsync.memory",
+    }
+    __POOLED: "WeakSet[StorageScheme]" = WeakSet()
+
+    MAX_CONNECTIONS = 8
+    KEEP_ALIVE = 60.0
+    # storage that lives within this process, which other processes cannot see
+    PROCESS_LOCAL = False
 
     @staticmethod
     def register_scheme(scheme_name: str, cls: Type[S]):
@@ -19,17 +56,63 @@ class StorageScheme(ABC):
     @staticmethod
     def for_url(url: namedtuple) -> "StorageScheme":
         scheme_class = StorageScheme.__SCHEME_TYPES.get(url.scheme, None)
+        if scheme_class is None and url.scheme in StorageScheme.__SCHEME_MODULES:
+            import_module(StorageScheme.__SCHEME_MODULES[url.scheme])
+            scheme_class = StorageScheme.__SCHEME_TYPES.get(url.scheme, None)
         if scheme_class is None:
             raise SchemeException(f"invalid scheme: '{url.scheme}' not supported")
-        return scheme_class(url)
+        scheme = scheme_class(url)
+        policy = get_policy()
+        if policy is not None:
+            scheme = PolicyStorageScheme(url, scheme, policy)
+        return scheme
+
+    @staticmethod
+    def shutdown() -> None:
+        for scheme in list(StorageScheme.__POOLED):
+            scheme.close()
 
     def __init__(self, url: namedtuple):
         self.__name = url.scheme
+        self.__pool: Optional[ResourcePool] = None
+        self.__pool_lock = Lock()
 
     @property
     def name(self):
         return self.__name
 
+    @property
+    def max_connections(self) -> int:
+        return self.MAX_CONNECTIONS
+
+    @property
+    def keep_alive(self) -> float:
+        return self.KEEP_ALIVE
+
+    @property
+    def process_local(self) -> bool:
+        return self.PROCESS_LOCAL
+
+    def connect(self) -> Any:
+        raise SchemeException(f"scheme does not use connections: {self.name}")
+
+    def disconnect(self, connection: Any) -> None:
+        pass
+
+    def connection(self) -> ContextManager[Any]:
+        with self.__pool_lock:
+            if self.__pool is None:
+                self.__pool = ResourcePool(self.connect, self.disconnect, self.max_connections, self.keep_alive)
+                StorageScheme.__POOLED.add(self)
+            pool = self.__pool
+        return pool.acquire()
+
+    def close(self) -> None:
+        with self.__pool_lock:
+            pool, self.__pool = self.__pool, None
+        if pool is not None:
+            pool.close()
+
     @abstractmethod
     def resolve_root(self, url: namedtuple) -> (str, Path, str):
         ...
@@ -46,6 +129,10 @@ class StorageScheme(ABC):
     def is_file(self, path: Path) -> bool:
         ...
 
+    @abstractmethod
+    def stat(self, path: Path) -> FileStat:
+        ...
+
     @abstractmethod
     def list_files(self, path: Path) -> Generator[Path, None, None]:
         ...
@@ -99,6 +186,10 @@ class FileStorageScheme(StorageScheme):
     def is_file(self, path: Path) -> bool:
         return path.is_file()
 
+    def stat(self, path: Path) -> FileStat:
+        stat = path.stat()
+        return FileStat(stat.st_size, stat.st_mtime)
+
     def list_files(self, path: Path) -> Generator[Path, None, None]:
         for entry in Path(path).iterdir():
             if entry.is_file():
@@ -117,3 +208,78 @@ class FileStorageScheme(StorageScheme):
 
     def delete(self, path) -> None:
         path.unlink()
+
+
+class PolicyStorageScheme(StorageScheme):
+
+    def __init__(self, url: namedtuple, scheme: StorageScheme, policy: Policy):
+        super().__init__(url)
+        self.__scheme = scheme
+        self.__policy = policy
+
+    def __eq__(self, other):
+        if isinstance(other, PolicyStorageScheme):
+            other = other.__scheme
+        return self.__scheme == other
+
+    def __hash__(self):
+        return hash(self.__scheme)
+
+    @property
+    def scheme(self) -> StorageScheme:
+        return self.__scheme
+
+    @property
+    def policy(self) -> Policy:
+        return self.__policy
+
+    @property
+    def process_local(self) -> bool:
+        return self.__scheme.process_local
+
+    def connection(self) -> ContextManager[Any]:
+        return self.__scheme.connection()
+
+    def close(self) -> None:
+        self.__scheme.close()
+
+    def resolve_root(self, url: namedtuple) -> (str, Path, str):
+        return self.__policy.call(self.__scheme.resolve_root, url)
+
+    def exists(self, path: Path) -> bool:
+        return self.__policy.call(self.__scheme.exists, path)
+
+    def is_dir(self, path: Path) -> bool:
+        return self.__policy.call(self.__scheme.is_dir, path)
+
+    def is_file(self, path: Path) -> bool:
+        return self.__policy.call(self.__scheme.is_file, path)
+
+    def stat(self, path: Path) -> FileStat:
+        return self.__policy.call(self.__scheme.stat, path)
+
+    def list_files(self, path: Path) -> Generator[Path, None, None]:
+        # listings are read in full, so that a failure part way through can be retried
+        yield from self.__policy.call(lambda: list(self.__scheme.list_files(path)))
+
+    def list_dirs(self, path: Path) -> Generator[Path, None, None]:
+        yield from self.__policy.call(lambda: list(self.__scheme.list_dirs(path)))
+
+    def mkdir(self, path: Path) -> None:
+        return self.__policy.call(self.__scheme.mkdir, path)
+
+    @contextmanager
+    def open(self, path: Path, mode: str) -> ContextManager[IO]:
+        # schemes may only open the file on entering its context, so that is what is retried
+        with ExitStack() as stack:
+            yield self.__policy.call(lambda: stack.enter_context(self.__scheme.open(path, mode)))
+
+    def delete(self, path) -> None:
+        return self.__policy.call(self.__scheme.delete, path)
+
+
+# register file:// storage scheme as standard
+StorageScheme.register_scheme(FILE_SCHEME, FileStorageScheme)
+
+# close any pooled connections on exit
+atexit.register(StorageScheme.shutdown)
@@ -0,0 +1,80 @@
+import os
+import io
+import sys
+import json
+import signal
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+
+from typing import List, Dict, Any
+
+from softsync.common import Root
+from softsync.client import ENCODING
+from softsync.policy import set_policy
+
+# commands run to completion without further input, so serving one never holds up the others for long
+SERVED_COMMANDS = {"cp", "rm", "ls", "repair", "diff", "verify"}
+
+
+class SoftSyncRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode(ENCODING))
+                response = self.server.execute(request["args"], request.get("cwd", None))
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"status": 1, "output": f"invalid request: {e}\n"}
+            self.wfile.write(json.dumps(response).encode(ENCODING) + b"\n")
+            self.wfile.flush()
+
+
+class SoftSyncServer(socketserver.UnixStreamServer):
+
+    def __init__(self, socket_path: str):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, SoftSyncRequestHandler)
+        self.__socket_path = socket_path
+        Root.enable_cache()
+
+    @property
+    def socket_path(self) -> str:
+        return self.__socket_path
+
+    def execute(self, args: List[str], cwd: str = None) -> Dict[str, Any]:
+        if len(args) == 0 or args[0] not in SERVED_COMMANDS:
+            command = args[0] if len(args) > 0 else ""
+            return {"status": 1, "output": f"command not served: '{command}'\n"}
+        from softsync.__main__ import cli
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            try:
+                set_policy(None)
+                if cwd is not None:
+                    os.chdir(cwd)
+                status = cli(["softsync"] + list(args)) or 0
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                print(f"command failed: {e}")
+                status = 1
+        return {"status": status, "output": output.getvalue()}
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.__socket_path):
+            os.unlink(self.__socket_path)
+
+
+def __terminate(signum, frame) -> None:
+    sys.exit(0)
+
+
+def serve(socket_path: str) -> None:
+    signal.signal(signal.SIGTERM, __terminate)
+    with SoftSyncServer(socket_path) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
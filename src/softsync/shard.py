@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib3x import Path
+
+from typing import List, Tuple, Optional, Callable, Generator, Any
+
+from softsync.common import Root, Options
+from softsync.exception import CommandException
+
+SHARDS_PER_JOB = 4
+
+Task = Callable[[Root, Path, Options], Optional[Any]]
+
+
+def walk_dirs(root: Root, path: Path) -> Generator[Path, None, None]:
+    pending = [path]
+    while len(pending) > 0:
+        path = pending.pop()
+        yield path
+        full_path = root.path / path
+        if root.scheme.exists(full_path):
+            pending.extend(sorted((path / d.name for d in root.scheme.list_dirs(full_path)), reverse=True))
+
+
+def run_sharded(root: Root, path: Path, task: Task,
+                options: Options = Options()) -> List[Tuple[Path, Any]]:
+    # each directory is given to exactly one worker, which is then the sole owner of its manifest
+    if options.jobs == 1:
+        results = [(p, task(root, p, options)) for p in walk_dirs(root, path)]
+    else:
+        if root.scheme.process_local:
+            raise CommandException(f"jobs option not valid for root: {root}, its storage is local to this process")
+        results = []
+        with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+            futures = [
+                executor.submit(__run_shard, root.spec, shard_path, recursive, task, options)
+                for shard_path, recursive in __partition(root, path, options.jobs * SHARDS_PER_JOB)
+            ]
+            for future in as_completed(futures):
+                results.extend(future.result())
+    return sorted([(p, r) for p, r in results if r is not None], key=lambda r: r[0].parts)
+
+
+def __partition(root: Root, path: Path, shards: int) -> List[Tuple[Path, bool]]:
+    partition = []
+    subtrees = [path]
+    while 0 < len(subtrees) < shards:
+        expanded = []
+        for subtree in subtrees:
+            partition.append((subtree, False))
+            full_path = root.path / subtree
+            if root.scheme.exists(full_path):
+                expanded.extend(subtree / d.name for d in root.scheme.list_dirs(full_path))
+        subtrees = expanded
+    partition.extend((subtree, True) for subtree in subtrees)
+    return partition
+
+
+def __run_shard(root_spec: str, path: Path, recursive: bool, task: Task,
+                options: Options) -> List[Tuple[Path, Any]]:
+    # the root is rebuilt from its spec, so that any parameters given with it are kept
+    root = Root(root_spec)
+    paths = walk_dirs(root, path) if recursive else [path]
+    return [(p, task(root, p, options)) for p in paths]
@@ -0,0 +1,71 @@
+import os
+import errno
+import shutil
+from pathlib3x import Path
+
+from typing import Tuple, Optional, Generator, Any
+
+CHUNK_SIZE = 1024 * 1024
+BLOCK_SIZE = 512
+
+__ZEROS = memoryview(bytes(CHUNK_SIZE))
+
+
+def is_sparse(file: Path) -> bool:
+    stat = file.stat()
+    # st_blocks is always in units of 512 bytes, whatever the filesystem block size
+    return hasattr(stat, "st_blocks") and stat.st_blocks * BLOCK_SIZE < stat.st_size
+
+
+def data_extents(fd: int, size: int) -> Generator[Tuple[int, int], None, None]:
+    if not hasattr(os, "SEEK_DATA"):
+        yield 0, size
+        return
+    pos = 0
+    while pos < size:
+        try:
+            start = os.lseek(fd, pos, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                return  # only a hole remains
+            if e.errno == errno.EINVAL:
+                yield pos, size  # holes not reported by this filesystem
+                return
+            raise
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        yield start, end
+        pos = end
+
+
+def copy_sparse(src_file: Path, dest_file: Path, digest: Optional[Any] = None) -> int:
+    # only the data extents are read and written, holes are seeked over so the copy stays sparse;
+    # the source is unbuffered, as finding the extents moves its position under any read-ahead buffer
+    with open(src_file, mode='rb', buffering=0) as src, open(dest_file, mode='wb') as dest:
+        size = os.fstat(src.fileno()).st_size
+        pos = 0
+        for start, end in data_extents(src.fileno(), size):
+            if digest is not None:
+                __hash_zeros(digest, start - pos)
+            src.seek(start)
+            dest.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = src.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if digest is not None:
+                    digest.update(chunk)
+                dest.write(chunk)
+                remaining -= len(chunk)
+            pos = end
+        if digest is not None:
+            __hash_zeros(digest, size - pos)
+        dest.truncate(size)
+    shutil.copymode(src_file, dest_file)
+    return size
+
+
+def __hash_zeros(digest: Any, length: int) -> None:
+    while length > 0:
+        digest.update(__ZEROS[:min(CHUNK_SIZE, length)])
+        length -= CHUNK_SIZE
@@ -1,28 +1,125 @@
+import os
+import hashlib
 from abc import ABC, abstractmethod
 from pathlib3x import Path
 from tempfile import mkdtemp
-from typing import TYPE_CHECKING, Type, TypeVar, Dict, Union, Tuple
+from typing import TYPE_CHECKING, Type, TypeVar, Dict, List, Union, Tuple, Optional
 
 from softsync.common import FILE_SCHEME, Root, Sync
+from softsync.common import is_modified
+from softsync.policy import get_policy
+from softsync.integrity import DIGEST_ALGORITHM, copy_hashed, check_copied_size
+from softsync.sparse import is_sparse, copy_sparse
 from softsync.exception import SyncException
 
 if TYPE_CHECKING:
     from softsync.context import SoftSyncContext
 
+SYMLINK_BATCH_SIZE = 1024
+
 
 def sync(src_file: Path, src_ctx: "SoftSyncContext",
-         dest_file: Path, dest_ctx: "SoftSyncContext") -> None:
+         dest_file: Path, dest_ctx: "SoftSyncContext",
+         batch: Optional["SymlinkBatch"] = None) -> bool:
+    if batch is not None:
+        # existing destinations are dealt with when the batch is flushed
+        batch.add(src_file, dest_file)
+        return True
     if dest_ctx.root.scheme.exists(dest_file):
         if dest_ctx.root.scheme.is_dir(dest_file):
             raise SyncException(f"destination is a directory: {dest_file}")
-        if not dest_ctx.options.force:
+        if dest_ctx.options.incremental:
+            if not is_modified(src_ctx.root.scheme.stat(src_file), dest_ctx.root.scheme.stat(dest_file)):
+                return False
+        elif not dest_ctx.options.force:
             raise SyncException(f"destination file exists: {dest_file}")
         if not dest_ctx.options.dry_run:
             dest_ctx.root.scheme.delete(dest_file)
+            dest_ctx.record_digest(dest_file.name, None)
     if not dest_ctx.options.dry_run:
         dest_ctx.root.scheme.mkdir(dest_file.parent)
-        StorageSync.for_schemes(src_ctx.root.scheme.name, dest_ctx.root.scheme.name) \
-            .sync(src_ctx.root, src_file, dest_ctx.root, dest_file, *dest_ctx.options.sync or [])
+        storage_sync = StorageSync.for_schemes(src_ctx.root.scheme.name, dest_ctx.root.scheme.name)
+        if dest_ctx.options.verify:
+            # verified files are always copied, hashing the bytes on the way through
+            transfer = storage_sync.copy_verified
+            transfer_args = (src_ctx.root, src_file, dest_ctx.root, dest_file)
+        else:
+            transfer = storage_sync.sync
+            transfer_args = (src_ctx.root, src_file, dest_ctx.root, dest_file, *(dest_ctx.options.sync or []))
+        policy = get_policy()
+        if policy is None:
+            digest = transfer(*transfer_args)
+        else:
+            size = src_ctx.root.scheme.stat(src_file).size if policy.limits_bytes else 0
+
+            def clean_up() -> None:
+                if dest_ctx.root.scheme.exists(dest_file):
+                    dest_ctx.root.scheme.delete(dest_file)
+
+            digest = policy.call(transfer, *transfer_args, size=size, on_retry=clean_up)
+        if dest_ctx.options.verify:
+            dest_ctx.record_digest(dest_file.name, digest)
+    return True
+
+
+def symlink_batch_for(src_ctx: "SoftSyncContext", dest_ctx: "SoftSyncContext") -> Optional["SymlinkBatch"]:
+    options = dest_ctx.options
+    if options.sync != [Sync.RELATIVE] or options.incremental or options.dry_run:
+        return None
+    if src_ctx.root.scheme.name != FILE_SCHEME or dest_ctx.root.scheme.name != FILE_SCHEME:
+        return None
+    return SymlinkBatch(options.force)
+
+
+class SymlinkBatch:
+
+    def __init__(self, force: bool = False, batch_size: int = SYMLINK_BATCH_SIZE):
+        self.__force = force
+        self.__batch_size = batch_size
+        self.__pending: Dict[Path, List[Tuple[str, str]]] = {}
+        self.__relative_dirs: Dict[Tuple[Path, Path], str] = {}
+        self.__count = 0
+
+    def add(self, src_file: Path, dest_file: Path) -> None:
+        dirs = (src_file.parent, dest_file.parent)
+        relative_dir = self.__relative_dirs.get(dirs, None)
+        if relative_dir is None:
+            relative_dir = os.path.relpath(*dirs)
+            self.__relative_dirs[dirs] = relative_dir
+        target = os.path.join(relative_dir, src_file.name)
+        self.__pending.setdefault(dest_file.parent, []).append((dest_file.name, target))
+        self.__count += 1
+        if self.__count >= self.__batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        pending, self.__pending, self.__count = self.__pending, {}, 0
+        for dest_dir, links in pending.items():
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            if os.symlink not in os.supports_dir_fd:
+                for name, target in links:
+                    self.__symlink(dest_dir, name, target, None)
+                continue
+            # each directory is opened once, and its links created relative to it
+            dir_fd = os.open(dest_dir, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+            try:
+                for name, target in links:
+                    self.__symlink(dest_dir, name, target, dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def __symlink(self, dest_dir: Path, name: str, target: str, dir_fd: Optional[int]) -> None:
+        path = name if dir_fd is not None else os.path.join(dest_dir, name)
+        try:
+            os.symlink(target, path, dir_fd=dir_fd)
+        except FileExistsError:
+            if not self.__force:
+                raise SyncException(f"destination file exists: {dest_dir / name}")
+            try:
+                os.unlink(path, dir_fd=dir_fd)
+            except (IsADirectoryError, PermissionError):
+                raise SyncException(f"destination is a directory: {dest_dir / name}")
+            os.symlink(target, path, dir_fd=dir_fd)
 
 
 class StorageSync(ABC):
@@ -71,6 +168,9 @@ class StorageSync(ABC):
     def sync(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path, *modes: Sync) -> None:
         ...
 
+    def copy_verified(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> str:
+        return copy_hashed(src_root, src_file, dest_root, dest_file)
+
 
 class FileFileStorageSync(StorageSync):
 
@@ -87,11 +187,23 @@ class FileFileStorageSync(StorageSync):
     def symlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
         dest_file.symlink_to(src_file)
 
+    def relative_symlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
+        dest_file.symlink_to(os.path.relpath(src_file, dest_file.parent))
+
     def hardlink(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
-        src_file.link_to(dest_file)
+        os.link(src_file, dest_file)
 
     def copy(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> None:
-        src_file.copy(dest_file)
+        if is_sparse(src_file):
+            copy_sparse(src_file, dest_file)
+        else:
+            src_file.copy(dest_file)
+
+    def copy_verified(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path) -> str:
+        digest = hashlib.new(DIGEST_ALGORITHM)
+        size = copy_sparse(src_file, dest_file, digest)
+        check_copied_size(dest_root, dest_file, size)
+        return digest.hexdigest()
 
     def sync(self, src_root: Root, src_file: Path, dest_root: Root, dest_file: Path, *modes: Sync) -> None:
         if not modes:
@@ -100,6 +212,9 @@ class FileFileStorageSync(StorageSync):
             if mode == Sync.SYMBOLIC:
                 self.symlink(src_root, src_file, dest_root, dest_file)
                 return
+            if mode == Sync.RELATIVE:
+                self.relative_symlink(src_root, src_file, dest_root, dest_file)
+                return
             if mode == Sync.HARDLINK:
                 if src_root.mount == dest_root.mount:
                     self.hardlink(src_root, src_file, dest_root, dest_file)
@@ -144,3 +259,7 @@ class ViaFileStorageSync(StorageSync):
             self.copy(src_root, src_file, dest_root, dest_file)
             return
         raise SyncException(f"failed to sync file: {src_file}")
+
+
+# register file:// to file:// storage sync as standard
+StorageSync.register_sync(FILE_SCHEME, FILE_SCHEME, FileFileStorageSync)
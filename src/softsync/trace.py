@@ -0,0 +1,78 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from threading import Lock, get_ident
+
+from typing import IO, List, Dict, Optional, Generator, ContextManager, Any
+
+
+class Tracer:
+
+    def __init__(self):
+        self.__pid = os.getpid()
+        self.__origin = time.perf_counter()
+        self.__events: List[Dict[str, Any]] = []
+        self.__lock = Lock()
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        return list(self.__events)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            # a chrome trace-event 'complete' event, with timestamps in microseconds
+            event = {
+                "name": name,
+                "cat": "softsync",
+                "ph": "X",
+                "ts": round((start - self.__origin) * 1e6, 3),
+                "dur": round((end - start) * 1e6, 3),
+                "pid": self.__pid,
+                "tid": get_ident(),
+                "args": {k: str(v) for k, v in attrs.items() if v is not None},
+            }
+            with self.__lock:
+                self.__events.append(event)
+
+    def write(self, file: IO[str]) -> None:
+        json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+    def save(self, path: str) -> None:
+        with open(path, mode='w') as file:
+            self.write(file)
+
+
+class NoSpan:
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+NO_SPAN = NoSpan()
+
+__TRACER: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    global __TRACER
+    __TRACER = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return __TRACER
+
+
+def span(name: str, **attrs: Any) -> ContextManager[None]:
+    # when not tracing, spans cost no more than the call
+    if __TRACER is None:
+        return NO_SPAN
+    return __TRACER.span(name, **attrs)
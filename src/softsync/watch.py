@@ -0,0 +1,119 @@
+from threading import Thread, Event
+from pathlib3x import Path
+
+from typing import Dict, List, Tuple, Optional, Callable, Generator
+
+from softsync.common import Root, Options
+from softsync.context import SoftSyncContext, FileEntry, SOFTSYNC_MANIFEST_FILENAME
+from softsync.scheme import FileStat
+from softsync.exception import ContextException, ContextCorruptException
+
+
+class WatchEvent:
+
+    def __init__(self, path: Path, conflicts: List[FileEntry], repaired: bool):
+        self.__path = path
+        self.__conflicts = conflicts
+        self.__repaired = repaired
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @property
+    def conflicts(self) -> List[FileEntry]:
+        return self.__conflicts
+
+    @property
+    def repaired(self) -> bool:
+        return self.__repaired
+
+    def __repr__(self) -> str:
+        message = "repaired" if self.repaired else "needs repair"
+        return f"{message}: {self.path}"
+
+
+class Watcher:
+
+    def __init__(self, root: Root, path: Path, options: Options = Options(),
+                 interval: float = 1.0, repair: bool = False):
+        self.__root = root
+        self.__path = path
+        self.__options = options
+        self.__interval = interval
+        self.__repair = repair
+        self.__stamps: Dict[Path, Tuple[FileStat, Optional[FileStat]]] = {}
+        self.__dirs: Dict[Path, List[Path]] = {}
+        self.__stopped = Event()
+        self.__thread: Optional[Thread] = None
+
+    def scan(self) -> Generator[WatchEvent, None, None]:
+        seen = set()
+        pending = [self.__path]
+        while len(pending) > 0:
+            path = pending.pop()
+            stamp = self.__stamp(path)
+            if stamp is None:
+                continue
+            seen.add(path)
+            if stamp != self.__stamps.get(path, None):
+                self.__stamps[path] = stamp
+                if self.__options.recursive:
+                    full_path = self.__root.path / path
+                    self.__dirs[path] = [path / d.name for d in self.__root.scheme.list_dirs(full_path)]
+                event = self.__check(path)
+                if event is not None:
+                    yield event
+            pending.extend(self.__dirs.get(path, []))
+        for path in list(self.__stamps.keys()):
+            if path not in seen:
+                del self.__stamps[path]
+                self.__dirs.pop(path, None)
+
+    def run(self, callback: Callable[[WatchEvent], None]) -> None:
+        while not self.__stopped.is_set():
+            for event in self.scan():
+                callback(event)
+            self.__stopped.wait(self.__interval)
+
+    def start(self, callback: Callable[[WatchEvent], None]) -> None:
+        if self.__thread is not None:
+            raise ValueError("watcher already started")
+        self.__stopped.clear()
+        self.__thread = Thread(target=self.run, args=(callback,), daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __stamp(self, path: Path) -> Optional[Tuple[FileStat, Optional[FileStat]]]:
+        full_path = self.__root.path / path
+        manifest_file = full_path / SOFTSYNC_MANIFEST_FILENAME
+        try:
+            if not self.__root.scheme.is_dir(full_path):
+                return None
+            manifest_stat = self.__root.scheme.stat(manifest_file) \
+                if self.__root.scheme.exists(manifest_file) else None
+            return self.__root.scheme.stat(full_path), manifest_stat
+        except FileNotFoundError:
+            return None
+
+    def __check(self, path: Path) -> Optional[WatchEvent]:
+        try:
+            SoftSyncContext(self.__root, path, True, self.__options)
+            return None
+        except ContextCorruptException as e:
+            repaired = self.__repair and not self.__options.dry_run
+            if repaired:
+                e.source.save()
+                self.__stamps[path] = self.__stamp(path)
+            return WatchEvent(path, e.conflicts, repaired)
+        except ContextException:
+            return None
+        except ValueError:
+            # the manifest may be caught part way through being rewritten, so look again on the next poll
+            self.__stamps.pop(path, None)
+            return None